@@ -5,6 +5,7 @@ import sys
 from .cameraExport import CameraExporter
 from .trackExport import TrackerExporter
 from .solverImport import SolverImporter
+from .solverAsync import AsyncSolver
 
 bl_info = {
     "name": "mocapMath Utility",
@@ -12,7 +13,7 @@ bl_info = {
     "version": (0, 0, 2),
     "blender": (2, 80, 0),
     "description": "Utility to bridge Blender to mocapMath.",
-    "warning": "[BETA] Dependent on external application, Windows 10 only.",
+    "warning": "[BETA] The external solver application is Windows 10 only.",
     "wiki_url": "https://github.com/FlantasticDan/mocapMath",
     "tracker_url": "https://github.com/FlantasticDan/mocapMath/issues",
     "category": "Import-Export",
@@ -25,7 +26,8 @@ class MocapSolver(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
-        return True
+        # os.startfile only exists on Windows
+        return hasattr(os, "startfile")
 
     def execute(self, context):
         os.startfile(os.path.join(sys.path[2], "mocapMath", "mocapSolver.exe"))
@@ -46,10 +48,12 @@ class mocapMathPanel(bpy.types.Panel):
 
         layout.label(text="2) Process Data")
         layout.operator("mocapmath.solver")
+        layout.operator("mocapmath.solve_async")
 
         layout.label(text="3) Import Solved Data")
         layout.operator("mocapmath.solve_import")
 
 # Registration
-classes = (mocapMathPanel, CameraExporter, TrackerExporter, SolverImporter, MocapSolver)
+classes = (mocapMathPanel, CameraExporter, TrackerExporter, SolverImporter, MocapSolver,
+           AsyncSolver)
 register, unregister = bpy.utils.register_classes_factory(classes)
@@ -0,0 +1,33 @@
+import numpy as np
+
+# binary solves are read with the mocapSolver package, see solverAsync.solverPackage
+
+def binaryCurrent(textPath):
+
+    '''True if a binary solve sits next to the text solve at textPath, is at least
+    as new as it and the mocapSolver package is there to read it.  Otherwise the
+    text solve is imported.'''
+
+    # imported here, solverAsync imports the importer which imports this module
+    from .solverAsync import solverPackage
+    try:
+        mocapSolver = solverPackage()
+    except ImportError:
+        return False
+    return mocapSolver.binaryCurrent(textPath)
+
+def binarySolve(SOLVE_FILE):
+
+    '''Reads a binary solve into the same dictionary SolverImporter builds from
+    mocapSolved.txt: {'frame_range': (first, last), joint: {frame: (x, y, z)}}.'''
+
+    from .solverAsync import solverPackage
+    header, positions, valid = solverPackage().binaryRead(SOLVE_FILE)
+    first = header['frame_range'][0]
+
+    SOLVE = {'frame_range': tuple(header['frame_range'])}
+    for j, joint in enumerate(header['joints']):
+        frames = np.flatnonzero(valid[j])
+        SOLVE[joint] = dict(zip((frames + first).tolist(),
+                                map(tuple, positions[j, frames].tolist())))
+    return SOLVE
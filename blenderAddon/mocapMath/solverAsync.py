@@ -0,0 +1,133 @@
+import glob
+import os
+import sys
+import threading
+import bpy
+
+from .solverImport import importSolve
+
+def solverPackage():
+
+    '''Imports the mocapSolver package, from the add-on's folder if it was copied
+    in there, otherwise from Blender's python path.'''
+
+    addonDir = os.path.dirname(os.path.abspath(__file__))
+    if addonDir not in sys.path:
+        sys.path.append(addonDir)
+    import mocapSolver
+    return mocapSolver
+
+def exportSolve(EXPORT, trackRange):
+
+    '''Solver EXPORT dictionary as the solve dictionary importSolve takes.'''
+
+    SOLVE = {'frame_range': (int(trackRange[0]), int(trackRange[1]))}
+    for joint in EXPORT:
+        SOLVE[joint] = {frame: tuple(point[:3]) for frame, point in EXPORT[joint].items()}
+    return SOLVE
+
+class SolveCancelled(Exception):
+    pass
+
+class AsyncSolver(bpy.types.Operator):
+    bl_idname = "mocapmath.solve_async"
+    bl_label = "Solve and Import"
+    bl_description = "Solves the exported camera and tracker data in the background and imports the solve."
+
+    cameraA: bpy.props.StringProperty(name="Camera 1 | CAMERA DATA", subtype='FILE_PATH')
+    trackerA: bpy.props.StringProperty(name="Camera 1 | TRACKER DATA", subtype='FILE_PATH')
+    cameraB: bpy.props.StringProperty(name="Camera 2 | CAMERA DATA", subtype='FILE_PATH')
+    trackerB: bpy.props.StringProperty(name="Camera 2 | TRACKER DATA", subtype='FILE_PATH')
+    window: bpy.props.IntProperty(name="Frames per Step", default=500, min=1,
+                                  description="Frames solved between progress updates")
+
+    def invoke(self, context, event):
+        # prefill with the exports next to the .blend file
+        directory = os.path.dirname(bpy.path.abspath(context.blend_data.filepath))
+        cameras = sorted(glob.glob(os.path.join(directory, "*_CAMERAexport.txt")))
+        trackers = sorted(glob.glob(os.path.join(directory, "*_TRACKERexport.txt")))
+        if len(cameras) == 2 and not self.cameraA:
+            self.cameraA, self.cameraB = cameras
+        if len(trackers) == 2 and not self.trackerA:
+            self.trackerA, self.trackerB = trackers
+        return context.window_manager.invoke_props_dialog(self, width=500)
+
+    def execute(self, context):
+        paths = [bpy.path.abspath(path) for path in (self.cameraA, self.trackerA,
+                                                     self.cameraB, self.trackerB)]
+        for path in paths:
+            if not os.path.isfile(path):
+                self.report({'ERROR'}, "Export file not found: {}".format(path))
+                return {'CANCELLED'}
+        try:
+            mocapSolver = solverPackage()
+        except ImportError:
+            self.report({'ERROR'}, "mocapSolver package not found, copy it into the mocapMath "
+                                   "add-on folder")
+            return {'CANCELLED'}
+
+        self._done = 0
+        self._total = 0
+        self._result = None
+        self._error = None
+        # the solve thread only touches the event and these locals, never the operator's
+        # properties, the modal handler sets the event on the main thread
+        cancel = self._cancel = threading.Event()
+        window = self.window
+
+        def progress(done, total):
+            # runs on the solve thread, no bpy in here
+            if cancel.is_set():
+                raise SolveCancelled()
+            self._done = done
+            self._total = total
+
+        def run():
+            try:
+                self._result = mocapSolver.solveTakeWindowed(*paths, window=window,
+                                                             progress=progress)
+            except Exception as error:
+                self._error = error
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._cancel.set()
+
+        if event.type == 'TIMER':
+            percent = 100 * self._done // self._total if self._total else 0
+            context.window_manager.progress_update(percent)
+            context.workspace.status_text_set("mocapMath solving... {}%  (Esc to cancel)"
+                                              .format(percent))
+
+            if not self._thread.is_alive():
+                self.finish(context)
+                if isinstance(self._error, SolveCancelled):
+                    self.report({'WARNING'}, "Solve cancelled")
+                    return {'CANCELLED'}
+                if self._error is not None:
+                    self.report({'ERROR'}, "Solve failed: {!r}".format(self._error))
+                    return {'CANCELLED'}
+
+                # straight from the solver into the scene, no mocapSolved.txt in between
+                EXPORT, clips, trackRange = self._result
+                importSolve(context, exportSolve(EXPORT, trackRange))
+                self.report({'INFO'}, "Solved and imported {} joints of {}".format(
+                    len(EXPORT), " and ".join(clips)))
+                return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
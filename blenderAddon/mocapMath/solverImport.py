@@ -1,4 +1,58 @@
 import bpy
+import numpy as np
+
+from .solveBinary import binaryCurrent, binarySolve
+
+def makeCube(context, name):
+
+    '''Creates cube and returns blender data object.'''
+
+    # build the 0.1 cube directly instead of through the operator
+    half = 0.05
+    verts = [(x, y, z) for x in (-half, half)
+             for y in (-half, half)
+             for z in (-half, half)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1),
+             (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    obj = bpy.data.objects.new(name, mesh)
+    context.collection.objects.link(obj)
+    return obj
+
+def addKeys(obj, frames, transforms):
+
+    '''Add every location keyframe at once straight to the object's fcurves'''
+
+    obj.animation_data_create()
+    obj.animation_data.action = bpy.data.actions.new(obj.name + "Action")
+    coordinates = np.empty((len(frames), 2), dtype='float32')
+    coordinates[:, 0] = frames
+    for axis in range(0, 3):
+        fcurve = obj.animation_data.action.fcurves.new(data_path="location", index=axis,
+                                                       action_group="Location")
+        fcurve.keyframe_points.add(len(frames))
+        coordinates[:, 1] = transforms[:, axis]
+        fcurve.keyframe_points.foreach_set("co", coordinates.ravel())
+        fcurve.update()
+
+def importSolve(context, SOLVE):
+
+    '''Creates an animated cube for every joint of a solve dictionary,
+    {'frame_range': (first, last), joint: {frame: (x, y, z)}}.'''
+
+    # set Blender frame range
+    context.scene.frame_start = SOLVE['frame_range'][0]
+    context.scene.frame_end = SOLVE['frame_range'][1]
+
+    for marker in SOLVE:
+        if marker != "frame_range":
+            joint = makeCube(context, marker)
+            frames = np.fromiter(SOLVE[marker], dtype='float32', count=len(SOLVE[marker]))
+            transforms = np.array(list(SOLVE[marker].values()),
+                                  dtype='float32').reshape(-1, 3)
+            addKeys(joint, frames, transforms)
 
 class SolverImporter(bpy.types.Operator):
     bl_idname = "mocapmath.solve_import"
@@ -14,49 +68,31 @@ class SolverImporter(bpy.types.Operator):
         filePath = ""
         for x in range(0, len(filepath) - 1):
             filePath = filePath + filepath[x] + "\\"
-        SOLVER = open(filePath + "mocapSolved.txt")
-
-        # read solver file
-        SOLVE = {}
-        for l, line in enumerate(SOLVER):
-            if l == 2:
-                split = line[:-1].split(" ")
-                SOLVE['frame_range'] = (int(split[1]), int(split[3]))
-            elif l > 4:
-                split = line[:-1].split(" ")
-                if split[0] == "#####":
-                    currentMarker = split[1]
-                    SOLVE[currentMarker] = {}
-                else:
-                    try:
-                        SOLVE[currentMarker][int(split[0])] = (float(split[1]), float(split[2]),
-                                                            float(split[3]))
-                    except IndexError:
-                        pass
-
-        # set Blender frame range
-        C.scene.frame_start = SOLVE['frame_range'][0]
-        C.scene.frame_end = SOLVE['frame_range'][1]
-
-        def makeCube(name):
-
-            '''Creates cube and returns blender data object.'''
-
-            bpy.ops.mesh.primitive_cube_add(size=0.1)
-            C.object.name = name
-            return D.objects[name]
-
-        def addKey(obj, frame, transform):
-
-            '''Add location keyframe'''
-
-            obj.location = transform
-            obj.keyframe_insert(data_path="location", frame=frame)
-
-        for marker in SOLVE:
-            if marker != "frame_range":
-                joint = makeCube(marker)
-                for frame in SOLVE[marker]:
-                    addKey(joint, frame, SOLVE[marker][frame])
-        
+        if binaryCurrent(filePath + "mocapSolved.txt"):
+            # full precision binary solve, no parsing needed, unless a later solve only wrote text
+            SOLVE = binarySolve(open(filePath + "mocapSolved.mcs", "rb"))
+        else:
+            SOLVER = open(filePath + "mocapSolved.txt")
+
+            # read solver file
+            SOLVE = {}
+            for l, line in enumerate(SOLVER):
+                if l == 2:
+                    split = line[:-1].split(" ")
+                    SOLVE['frame_range'] = (int(split[1]), int(split[3]))
+                elif l > 4:
+                    split = line[:-1].split(" ")
+                    if split[0] == "#####":
+                        currentMarker = split[1]
+                        SOLVE[currentMarker] = {}
+                    else:
+                        try:
+                            SOLVE[currentMarker][int(split[0])] = (float(split[1]),
+                                                                   float(split[2]),
+                                                                   float(split[3]))
+                        except IndexError:
+                            pass
+
+        importSolve(C, SOLVE)
+
         return {"FINISHED"}
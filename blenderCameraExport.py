@@ -5,6 +5,7 @@
 # Configure Workspace
 import bpy
 import math
+import numpy as np
 D = bpy.data
 C = bpy.context
 
@@ -28,6 +29,23 @@ ASPECT_RATIO = CLIP.size[1] / CLIP.size[0]
 SENSOR_Y = CAMERA.sensor_width * ASPECT_RATIO
 ANGLE_Y = 2 * (math.atan(SENSOR_Y / (2 * CAMERA.lens)))
 
+def channelValues(obj, dataPath, index, frames):
+
+    '''Values of one baked transform channel on every frame, read from the
+    object's fcurve instead of re-evaluating the scene frame by frame.'''
+
+    action = obj.animation_data.action if obj.animation_data else None
+    fcurve = action.fcurves.find(dataPath, index=index) if action else None
+    if fcurve is None:
+        # channel isn't animated
+        return [getattr(obj, dataPath)[index]] * len(frames)
+
+    # keyframes in bulk, evaluate only the frames without one
+    keys = np.empty(len(fcurve.keyframe_points) * 2, dtype='float32')
+    fcurve.keyframe_points.foreach_get("co", keys)
+    keyed = dict(zip(keys[0::2].tolist(), keys[1::2].tolist()))
+    return [keyed[frame] if frame in keyed else fcurve.evaluate(frame) for frame in frames]
+
 # create export file
 filepath = C.blend_data.filepath
 filepath = filepath[:-6] # strip '.blend'
@@ -46,16 +64,14 @@ EXPORT.write("LENS(mm) {}\n\n".format(CAMERA.lens))
 EXPORT.write("ANGLE OF VIEW(radians) {} x {}\n\n\n".format(CAMERA.angle_x, ANGLE_Y))
 
 # keyframe export
-frame = SCENE.frame_start
-while frame <= SCENE.frame_end:
-    SCENE.frame_set(frame)
-    EXPORT.write("{:05d} ".format(frame))
-    EXPORT.write("{:6f} ".format(CAMERA_OBJ.location[0])) # position X
-    EXPORT.write("{:6f} ".format(CAMERA_OBJ.location[1])) # position Y
-    EXPORT.write("{:6f} ".format(CAMERA_OBJ.location[2])) # position Z
-    EXPORT.write("{:6f} ".format(CAMERA_OBJ.rotation_euler[0])) # rotation X (radians)
-    EXPORT.write("{:6f} ".format(CAMERA_OBJ.rotation_euler[1])) # rotation Y (radians)
-    EXPORT.write("{:6f}\n".format(CAMERA_OBJ.rotation_euler[2])) # rotation Z (radians)
-    frame = frame + 1
+frames = list(range(SCENE.frame_start, SCENE.frame_end + 1))
+columns = (channelValues(CAMERA_OBJ, "location", 0, frames), # position X
+           channelValues(CAMERA_OBJ, "location", 1, frames), # position Y
+           channelValues(CAMERA_OBJ, "location", 2, frames), # position Z
+           channelValues(CAMERA_OBJ, "rotation_euler", 0, frames), # rotation X (radians)
+           channelValues(CAMERA_OBJ, "rotation_euler", 1, frames), # rotation Y (radians)
+           channelValues(CAMERA_OBJ, "rotation_euler", 2, frames)) # rotation Z (radians)
+EXPORT.write("".join("{:05d} {:6f} {:6f} {:6f} {:6f} {:6f} {:6f}\n".format(frame, *row)
+                     for frame, row in zip(frames, zip(*columns))))
 
 EXPORT.close() # close export file
@@ -4,6 +4,10 @@
 
 # Configure Workspace
 import bpy
+import os
+import json
+import struct
+import numpy as np
 D = bpy.data
 C = bpy.context
 
@@ -13,25 +17,51 @@ filepath = filepath.split("\\")
 filePath = ""
 for x in range(0, len(filepath) - 1):
     filePath = filePath + filepath[x] + "\\"
-SOLVER = open(filePath + "mocapSolved.txt")
-
-# read solver file
 SOLVE = {}
-for l, line in enumerate(SOLVER):
-    if l == 2:
-        split = line[:-1].split(" ")
-        SOLVE['frame_range'] = (int(split[1]), int(split[3]))
-    elif l > 4:
-        split = line[:-1].split(" ")
-        if split[0] == "#####":
-            currentMarker = split[1]
-            SOLVE[currentMarker] = {}
-        else:
-            try:
-                SOLVE[currentMarker][int(split[0])] = (float(split[1]), float(split[2]),
-                                                       float(split[3]))
-            except IndexError:
-                pass
+# a binary solve older than the text solve is left over from an earlier run
+BINARY_CURRENT = os.path.exists(filePath + "mocapSolved.mcs")
+if BINARY_CURRENT and os.path.exists(filePath + "mocapSolved.txt"):
+    BINARY_CURRENT = (os.path.getmtime(filePath + "mocapSolved.mcs") >=
+                      os.path.getmtime(filePath + "mocapSolved.txt"))
+if BINARY_CURRENT:
+    # read full precision binary solve: magic, JSON header, positions, validity flags
+    with open(filePath + "mocapSolved.mcs", "rb") as SOLVER:
+        BINARY = SOLVER.read()
+    if BINARY[:8] != b"MOCAPSLV":
+        raise Exception("mocapSolved.mcs is not a mocapMath binary solve!")
+    length = struct.unpack_from("<I", BINARY, 8)[0]
+    header = json.loads(BINARY[12:12 + length].decode())
+    SOLVE['frame_range'] = tuple(header['frame_range'])
+    jointCount = len(header['joints'])
+    frameCount = SOLVE['frame_range'][1] - SOLVE['frame_range'][0] + 1
+    positions = np.frombuffer(BINARY, dtype=np.dtype(header['dtype']),
+                              count=jointCount * frameCount * 3,
+                              offset=12 + length).reshape(jointCount, frameCount, 3)
+    valid = np.frombuffer(BINARY, dtype='uint8', count=jointCount * frameCount,
+                          offset=12 + length + positions.nbytes).reshape(jointCount, frameCount)
+    for j, joint in enumerate(header['joints']):
+        frames = np.flatnonzero(valid[j])
+        SOLVE[joint] = dict(zip((frames + SOLVE['frame_range'][0]).tolist(),
+                                map(tuple, positions[j, frames].tolist())))
+else:
+    SOLVER = open(filePath + "mocapSolved.txt")
+
+    # read solver file
+    for l, line in enumerate(SOLVER):
+        if l == 2:
+            split = line[:-1].split(" ")
+            SOLVE['frame_range'] = (int(split[1]), int(split[3]))
+        elif l > 4:
+            split = line[:-1].split(" ")
+            if split[0] == "#####":
+                currentMarker = split[1]
+                SOLVE[currentMarker] = {}
+            else:
+                try:
+                    SOLVE[currentMarker][int(split[0])] = (float(split[1]), float(split[2]),
+                                                           float(split[3]))
+                except IndexError:
+                    pass
 
 # set Blender frame range
 C.scene.frame_start = SOLVE['frame_range'][0]
@@ -41,19 +71,40 @@ def makeCube(name):
 
     '''Creates cube and returns blender data object.'''
 
-    bpy.ops.mesh.primitive_cube_add(size=0.1)
-    C.object.name = name
-    return D.objects[name]
+    # build the 0.1 cube directly instead of through the operator
+    half = 0.05
+    verts = [(x, y, z) for x in (-half, half)
+             for y in (-half, half)
+             for z in (-half, half)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1),
+             (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    mesh = D.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    obj = D.objects.new(name, mesh)
+    C.collection.objects.link(obj)
+    return obj
 
-def addKey(obj, frame, transform):
+def addKeys(obj, frames, transforms):
 
-    '''Add location keyframe'''
+    '''Add every location keyframe at once straight to the object's fcurves'''
 
-    obj.location = transform
-    obj.keyframe_insert(data_path="location", frame=frame)
+    obj.animation_data_create()
+    obj.animation_data.action = D.actions.new(obj.name + "Action")
+    coordinates = np.empty((len(frames), 2), dtype='float32')
+    coordinates[:, 0] = frames
+    for axis in range(0, 3):
+        fcurve = obj.animation_data.action.fcurves.new(data_path="location", index=axis,
+                                                       action_group="Location")
+        fcurve.keyframe_points.add(len(frames))
+        coordinates[:, 1] = transforms[:, axis]
+        fcurve.keyframe_points.foreach_set("co", coordinates.ravel())
+        fcurve.update()
 
 for marker in SOLVE:
     if marker != "frame_range":
         joint = makeCube(marker)
-        for frame in SOLVE[marker]:
-            addKey(joint, frame, SOLVE[marker][frame])
+        frames = np.fromiter(SOLVE[marker], dtype='float32', count=len(SOLVE[marker]))
+        transforms = np.array(list(SOLVE[marker].values()),
+                              dtype='float32').reshape(-1, 3)
+        addKeys(joint, frames, transforms)
@@ -4,6 +4,7 @@
 
 # Configure Workspace
 import bpy
+import numpy as np
 D = bpy.data
 C = bpy.context
 
@@ -12,6 +13,24 @@ SCENE = C.scene
 CLIP = D.movieclips[0]
 TRACKER = CLIP.tracking.tracks
 
+def markerRows(markers):
+
+    '''Formats every unmuted marker of a track in one go, reading frame, co and
+    mute for the whole track with foreach_get instead of per marker lookups.'''
+
+    count = len(markers)
+    frames = np.empty(count, dtype='int32')
+    co = np.empty(count * 2, dtype='float32')
+    mute = np.empty(count, dtype='bool')
+    markers.foreach_get("frame", frames)
+    markers.foreach_get("co", co)
+    markers.foreach_get("mute", mute)
+
+    valid = ~mute # check for valid track
+    co = co.reshape(count, 2)[valid]
+    return "".join("{:05d} {:6f} {:6f}\n".format(frame, x, y)
+                   for frame, (x, y) in zip(frames[valid].tolist(), co.tolist()))
+
 # create export file
 filepath = C.blend_data.filepath
 filepath = filepath[:-6] # strip '.blend'
@@ -27,19 +46,9 @@ EXPORT.write("RANGE {} to {}\n\n".format(SCENE.frame_start, SCENE.frame_end))
 EXPORT.write("RESOLUTION {} x {}\n\n".format(CLIP.size[0], CLIP.size[1]))
 EXPORT.write("NUMBER OF TRACKS {}\n\n".format(len(TRACKER)))
 
-# export tracker coordinates
-cTrack = 0
-cMarker = 0
-while cTrack < len(TRACKER):
-    EXPORT.write("\n##### {}\n".format(TRACKER[cTrack].name))
-    cMarker = 0
-    while cMarker < len(TRACKER[cTrack].markers):
-        if TRACKER[cTrack].markers[cMarker].mute is not True: # check for valid track
-            EXPORT.write("{:05d} ".format(TRACKER[cTrack].markers[cMarker].frame))
-            EXPORT.write("{:6f} ".format(TRACKER[cTrack].markers[cMarker].co[0]))
-            EXPORT.write("{:6f}\n".format(TRACKER[cTrack].markers[cMarker].co[1]))
-        cMarker = cMarker + 1
-    cTrack = cTrack + 1
+# export tracker coordinates, one write per track
+for track in TRACKER:
+    EXPORT.write("\n##### {}\n".format(track.name) + markerRows(track.markers))
 
 # close export file
 EXPORT.close()
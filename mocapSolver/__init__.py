@@ -0,0 +1,34 @@
+# mocapSolver: solves 3d motion capture points from exported camera and tracker data
+
+from .dataRead import cameraRead, trackerRead, markerList, jointList
+from .trackData import PRECISIONS, CameraData, MarkerData, TrackerData, cameraLoad, trackerLoad
+from .bulkRead import cameraBulkLoad, trackerBulkLoad, trackerSections
+from .lazyTracker import (INDEX_VERSION, trackerIndexPath, indexWrite, indexRead, LazyMarkers,
+                          trackerLazyLoad)
+from .rotation import GIMBAL_EPSILON, matrixEulers, eulerRotateAxis, eulerRotate
+from .triangulate import (angleOfViewCalc, pointRotate, pointsOnLine,
+                          closestDistanceBetweenLines, lineCross)
+from .cameraModel import CAMERA_MODELS, CameraIntrinsics, cameraLens
+from .vectorTriangulate import (axisMatrices, eulerMatrices, localRays, rayDirections,
+                                closestPointsBetweenRays, lineCrossBatch, cameraMatrices,
+                                lineCrossFrames)
+from .markerIndex import MarkerIndex, JointMarkers, markerCoverage
+from .crossCache import CrossCache
+from .multiCamera import (solveRangeMulti, closestPointToRays, multiRays, multiCrossCheck,
+                          solveMulti)
+from .solver import (solveRange, markerCrossCheck, solveQueue, solveChain, jointGroups,
+                     parallelSolve, solve, solveScalar, loadTake, solveTake, solveTakeMulti,
+                     defaultExportPath)
+from .solveExport import KEYFRAME_FORMAT, RESIDUAL_FORMAT, solveHeader, solveRows, solveWrite
+from .residuals import (RESIDUAL_PERCENTILES, residualArrays, residualSummary, residualPath,
+                        residualWrite)
+from .solveBinary import (BINARY_MAGIC, BINARY_VERSION, binaryPath, binaryCurrent,
+                          binaryDiscard, solveArrays, binaryWrite, binaryRead, binaryToExport)
+from .streamSolve import (rowAfter, ExportWindows, takeWindows, solveWindows, streamWrite,
+                          solveTakeWindowed, solveTakeStreaming)
+from .incrementalSolve import (CACHE_VERSION, solveCachePath, frameHashes, cameraFingerprint,
+                               trackerFingerprint, takeFingerprint, cacheWrite, cacheRead,
+                               solveIncremental, solveTakeIncremental)
+from .trackFilter import (FILL_METHODS, SMOOTH_METHODS, gapLengths, fillGaps, savgolKernels,
+                          gaussianKernel, runBounds, smoothTrack, filterSolve)
+from .solveProfile import SolveProfile, profiled, profilePath
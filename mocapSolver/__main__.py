@@ -0,0 +1,156 @@
+# headless command line entry point: python -m mocapSolver
+
+import argparse
+import functools
+import sys
+from contextlib import nullcontext
+
+from .solver import solveTake, solveTakeMulti, defaultExportPath
+from .solveProfile import SolveProfile, profilePath
+from .streamSolve import solveTakeStreaming
+from .incrementalSolve import solveTakeIncremental
+from .trackFilter import FILL_METHODS, SMOOTH_METHODS, filterSolve
+from .trackData import PRECISIONS
+from .cameraModel import CAMERA_MODELS
+
+def main(argv=None):
+
+    '''Solves one or more takes given as groups of export files, a camera and a
+    tracker export per camera.'''
+
+    parser = argparse.ArgumentParser(prog="mocapSolver",
+                                     description="Solves 3d motion capture points from "
+                                                 "exported camera and tracker data.")
+    parser.add_argument("exports", nargs="+",
+                        help="groups of files per take: camera 1 CAMERA DATA, camera 1 "
+                             "TRACKER DATA, camera 2 CAMERA DATA, camera 2 TRACKER DATA, ...")
+    parser.add_argument("-c", "--cameras", type=int, default=2,
+                        help="cameras per take, more than 2 solves every joint frame from "
+                             "all cameras that see it (default: 2)")
+    parser.add_argument("-o", "--output", action="append", default=[],
+                        help="solve export path, once per take "
+                             "(default: mocapSolved.txt next to camera 1's export)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="worker processes to solve groups of joints on, shared by "
+                             "every take of the run (default: 1)")
+    parser.add_argument("-w", "--window", type=int, default=0,
+                        help="stream the solve this many frames at a time to bound memory "
+                             "on long takes (2 camera takes only)")
+    parser.add_argument("-b", "--binary", action="store_true",
+                        help="also write a full precision binary solve (mocapSolved.mcs)")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="keep a solve cache next to the solve and only re-solve joint "
+                             "frames whose exports changed since the last run "
+                             "(2 camera takes only)")
+    parser.add_argument("-r", "--residuals", action="store_true",
+                        help="add each point's triangulation residual as a 5th column and "
+                             "write residual statistics to mocapSolved.residuals.json")
+    parser.add_argument("-p", "--precision", choices=PRECISIONS, default='float64',
+                        help="float32 halves the memory of the parsed exports and the "
+                             "binary solve, lines are still crossed in float64.  Rounding "
+                             "the exports moves points by around 1e-5 (up to 5e-4 on near "
+                             "parallel lines), enough to change the 6th decimal of most "
+                             "exported points, check a take with mocapSolver.precisionReport "
+                             "(default: float64)")
+    parser.add_argument("-m", "--camera-model", choices=CAMERA_MODELS, default='angles',
+                        help="angles nudges each camera by the angle of view like the "
+                             "original solver, pinhole projects through the lens, sensor "
+                             "and resolution of the camera exports (default: angles)")
+    parser.add_argument("--joints",
+                        help="comma separated joints to solve, parsing only their markers "
+                             "of the tracker exports (default: every joint)")
+    parser.add_argument("--tracker-index", action="store_true",
+                        help="keep an index of marker offsets next to each tracker export "
+                             "so later --joints solves don't scan the export")
+    parser.add_argument("--fill", choices=FILL_METHODS,
+                        help="interpolate every joint over its unsolved frames")
+    parser.add_argument("--max-gap", type=int, default=None,
+                        help="leave gaps longer than this many frames unfilled")
+    parser.add_argument("--smooth", choices=SMOOTH_METHODS,
+                        help="smooth every joint's track, Savitzky-Golay or gaussian low-pass")
+    parser.add_argument("--smooth-window", type=int, default=9,
+                        help="frames each smoothed frame is averaged over, odd (default: 9)")
+    parser.add_argument("--smooth-order", type=int, default=3,
+                        help="Savitzky-Golay polynomial order (default: 3)")
+    parser.add_argument("--stats", action="store_true",
+                        help="report parse throughput of every export file")
+    parser.add_argument("--profile", action="store_true",
+                        help="write stage and joint timings and counters of the solve to "
+                             "mocapSolved.profile.json next to it (2 camera takes only)")
+    args = parser.parse_args(argv)
+
+    group = 2 * args.cameras
+    if args.cameras < 2 or len(args.exports) % group:
+        parser.error("exports must be given in groups of {} files per take".format(group))
+    takes = [args.exports[i:i + group] for i in range(0, len(args.exports), group)]
+    if args.window and (args.cameras > 2 or args.binary):
+        parser.error("--window only streams 2 camera takes to the text format")
+    if args.incremental and (args.cameras > 2 or args.window or args.binary):
+        parser.error("--incremental only re-solves 2 camera takes to the text format")
+    if args.residuals and args.window:
+        parser.error("--residuals can't be streamed with --window")
+    if (args.joints or args.tracker_index) and (args.window or args.incremental):
+        parser.error("--joints and --tracker-index only apply to full solves")
+    joints = args.joints.split(",") if args.joints else None
+    if args.precision != 'float64' and (args.window or args.incremental):
+        parser.error("--precision only applies to full solves, not --window or --incremental")
+    if args.camera_model != 'angles' and (args.window or args.incremental):
+        parser.error("--camera-model only applies to full solves, not --window or "
+                     "--incremental")
+    if args.profile and (args.cameras > 2 or args.window or args.incremental):
+        parser.error("--profile only instruments full 2 camera solves")
+    cleanup = None
+    if args.fill or args.smooth:
+        if args.window or args.incremental:
+            parser.error("--fill and --smooth need the whole solve, not --window or "
+                         "--incremental")
+        if args.smooth and (args.smooth_window < 3 or args.smooth_window % 2 == 0):
+            parser.error("--smooth-window must be an odd number of frames, 3 or more")
+        if args.smooth == 'savgol' and args.smooth_order >= args.smooth_window:
+            parser.error("--smooth-order must be less than --smooth-window")
+        cleanup = functools.partial(filterSolve, fill=args.fill, maxGap=args.max_gap,
+                                    smooth=args.smooth, window=args.smooth_window,
+                                    order=args.smooth_order)
+    if args.output and len(args.output) != len(takes):
+        parser.error("give one --output per take or none at all")
+
+    context = nullcontext()
+    if args.workers > 1 and args.cameras == 2 and not (args.window or args.incremental):
+        # multiprocessing is a large share of importing the package, only parallel solves need it
+        from concurrent.futures import ProcessPoolExecutor
+        context = ProcessPoolExecutor(max_workers=args.workers)
+    with context as pool:
+        for t, take in enumerate(takes):
+            _solveOne(args, t, take, joints, cleanup, pool)
+    return 0
+
+def _solveOne(args, t, take, joints, cleanup, pool):
+
+    '''Solves take number t of the command line as main's arguments ask.'''
+
+    exportPath = args.output[t] if args.output else defaultExportPath(take[0])
+    stats = {} if args.stats else None
+    if args.cameras > 2:
+        solveTakeMulti(take[0::2], take[1::2], exportPath, stats=stats, binary=args.binary,
+                       residuals=args.residuals, cleanup=cleanup, dtype=args.precision,
+                       joints=joints, sidecar=args.tracker_index, model=args.camera_model)
+    elif args.incremental:
+        resolved = solveTakeIncremental(*take, exportPath, residuals=args.residuals)
+        print("Re-solved {} joint frames.".format(resolved))
+    elif args.window:
+        solveTakeStreaming(*take, exportPath, window=args.window)
+    else:
+        profile = SolveProfile() if args.profile else None
+        solveTake(*take, exportPath, stats=stats, workers=args.workers, binary=args.binary,
+                  profile=profile, residuals=args.residuals, cleanup=cleanup,
+                  dtype=args.precision, joints=joints, sidecar=args.tracker_index,
+                  model=args.camera_model, pool=pool)
+        if profile is not None:
+            print("Profile Exported to {}.".format(profilePath(exportPath)))
+    if stats:
+        for path in stats:
+            print("Parsed {} at {:.1f} MB/s.".format(path, stats[path]['mb_per_s']))
+    print("Solve Exported to {}.".format(exportPath))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# batch solving, finds every take under a directory tree and solves them over a worker pool
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .solver import solveTake, solveTakeMulti
+from .solveBinary import binaryPath
+from .residuals import residualPath
+from .trackData import PRECISIONS
+
+CAMERA_SUFFIX = "_CAMERAexport.txt"
+TRACKER_SUFFIX = "_TRACKERexport.txt"
+EXPORT_NAME = "mocapSolved.txt"
+
+log = logging.getLogger(__name__)
+
+def _pairExports(cameras, trackers):
+
+    '''Pairs a directory's camera and tracker exports, by name when every camera
+    export has a tracker export of the same prefix, otherwise in sorted order.'''
+
+    prefixes = {os.path.basename(tracker)[:-len(TRACKER_SUFFIX)]: tracker
+                for tracker in trackers}
+    byName = [prefixes.get(os.path.basename(camera)[:-len(CAMERA_SUFFIX)])
+              for camera in cameras]
+    if None not in byName:
+        return list(cameras), byName
+    return list(cameras), list(trackers)
+
+def findTakes(root, cameras=2):
+
+    '''Finds the takes under a directory tree, any directory holding a camera and
+    a tracker export for each of cameras cameras, directories holding some other
+    number of exports are logged and skipped.  Returns list of
+    {'directory', 'cameras', 'trackers', 'export'} dictionaries.'''
+
+    takes = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        cameraFiles = sorted(os.path.join(directory, name) for name in files
+                             if name.endswith(CAMERA_SUFFIX))
+        trackerFiles = sorted(os.path.join(directory, name) for name in files
+                              if name.endswith(TRACKER_SUFFIX))
+        if len(cameraFiles) != cameras or len(trackerFiles) != cameras:
+            if cameraFiles or trackerFiles:
+                log.warning("%s: skipped, %d camera and %d tracker exports for %d cameras",
+                            directory, len(cameraFiles), len(trackerFiles), cameras)
+            continue
+        camPaths, trackPaths = _pairExports(cameraFiles, trackerFiles)
+        takes.append({'directory': directory, 'cameras': camPaths, 'trackers': trackPaths,
+                      'export': os.path.join(directory, EXPORT_NAME)})
+    return takes
+
+def takeOutputs(take, binary=False, residuals=False):
+
+    '''Every file solving a take writes.'''
+
+    outputs = [take['export']]
+    if binary:
+        outputs.append(binaryPath(take['export']))
+    if residuals:
+        outputs.append(residualPath(take['export']))
+    return outputs
+
+def upToDate(take, binary=False, residuals=False):
+
+    '''True if all of a take's outputs exist and are newer than all of its exports.'''
+
+    outputs = takeOutputs(take, binary, residuals)
+    if not all(os.path.exists(output) for output in outputs):
+        return False
+    newest = max(os.path.getmtime(path) for path in take['cameras'] + take['trackers'])
+    return min(os.path.getmtime(output) for output in outputs) >= newest
+
+def solveJob(take, binary=False, residuals=False, dtype='float64'):
+
+    '''Solves one take of findTakes in place in dtype precision, replacing stale
+    outputs.  The solve is written to a scratch directory next to the exports and
+    only moved over the old outputs once it succeeded, a failed solve leaves them
+    as they were.  Returns the take's manifest entry.'''
+
+    begin = time.perf_counter()
+    entry = dict(take, status='solved')
+    scratch = tempfile.mkdtemp(prefix=".mocapSolve-", dir=take['directory'])
+    try:
+        solving = dict(take, export=os.path.join(scratch, os.path.basename(take['export'])))
+        if len(take['cameras']) > 2:
+            solveTakeMulti(take['cameras'], take['trackers'], solving['export'], binary=binary,
+                           residuals=residuals, dtype=dtype)
+        else:
+            solveTake(*[path for pair in zip(take['cameras'], take['trackers']) for path in pair],
+                      solving['export'], binary=binary, residuals=residuals, dtype=dtype)
+        # replacing keeps the modification times, the binary solve stays as new as the text
+        outputs = takeOutputs(take, binary, residuals)
+        for new, output in zip(takeOutputs(solving, binary, residuals), outputs):
+            os.replace(new, output)
+        # an older binary solve or residual summary this solve didn't write is stale
+        for output in takeOutputs(take, True, True):
+            if output not in outputs and os.path.exists(output):
+                os.remove(output)
+    except Exception as error:
+        entry['status'] = 'failed'
+        entry['error'] = "{}: {}".format(type(error).__name__, error)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    entry['seconds'] = time.perf_counter() - begin
+    return entry
+
+def solveBatch(takes, workers=1, binary=False, residuals=False, force=False, progress=None,
+               dtype='float64'):
+
+    '''Solves every take that isn't up to date (or all of them with force) over a
+    pool of worker processes, one take per job.  progress is called with each
+    finished manifest entry.  Returns manifest dictionary.'''
+
+    begin = time.perf_counter()
+    entries = []
+    queue = []
+    for take in takes:
+        if not force and upToDate(take, binary, residuals):
+            entries.append(dict(take, status='skipped', seconds=0.0))
+            if progress is not None:
+                progress(entries[-1])
+        else:
+            queue.append(take)
+
+    if workers > 1 and len(queue) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(solveJob, take, binary, residuals, dtype) for take in queue]
+            for job in as_completed(jobs):
+                entries.append(job.result())
+                if progress is not None:
+                    progress(entries[-1])
+    else:
+        for take in queue:
+            entries.append(solveJob(take, binary, residuals, dtype))
+            if progress is not None:
+                progress(entries[-1])
+
+    # manifest in the order the takes were found
+    order = {take['directory']: t for t, take in enumerate(takes)}
+    entries.sort(key=lambda entry: order[entry['directory']])
+    counts = {status: sum(entry['status'] == status for entry in entries)
+              for status in ('solved', 'skipped', 'failed')}
+    return {'takes': entries, 'counts': counts, 'workers': workers, 'precision': dtype,
+            'solve_seconds': sum(entry['seconds'] for entry in entries),
+            'wall_seconds': time.perf_counter() - begin}
+
+def main(argv=None):
+
+    '''Solves every take found under one or more directories.'''
+
+    parser = argparse.ArgumentParser(prog="mocapSolver.batchSolve",
+                                     description="Finds and solves every take under "
+                                                 "directory trees, writing each solve next "
+                                                 "to its exports.")
+    parser.add_argument("roots", nargs="+", help="directories to search for takes")
+    parser.add_argument("-c", "--cameras", type=int, default=2,
+                        help="cameras per take (default: 2)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="takes solved at once (default: one per CPU)")
+    parser.add_argument("-b", "--binary", action="store_true",
+                        help="also write a full precision binary solve (mocapSolved.mcs)")
+    parser.add_argument("-r", "--residuals", action="store_true",
+                        help="add residuals to every solve and mocapSolved.residuals.json")
+    parser.add_argument("-p", "--precision", choices=PRECISIONS, default='float64',
+                        help="float32 halves each worker's parsed exports but changes the "
+                             "6th decimal of most exported points, see "
+                             "mocapSolver.precisionReport (default: float64)")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="solve takes again even if their solve is up to date")
+    parser.add_argument("-m", "--manifest", default="mocapBatch.json",
+                        help="summary manifest path (default: mocapBatch.json)")
+    args = parser.parse_args(argv)
+
+    takes = []
+    for root in args.roots:
+        takes.extend(findTakes(root, args.cameras))
+    print("Found {} takes.".format(len(takes)))
+
+    def report(entry):
+        print("{:>7} {:8.2f}s {}".format(entry['status'], entry['seconds'],
+                                         entry['directory']))
+        if 'error' in entry:
+            print("        " + entry['error'])
+
+    manifest = solveBatch(takes, args.workers, args.binary, args.residuals, args.force, report,
+                          args.precision)
+    with open(args.manifest, "w") as FILE:
+        json.dump(manifest, FILE, indent=2)
+    print("Solved {solved}, skipped {skipped}, failed {failed}.".format(**manifest['counts']))
+    print("Manifest Exported to {}.".format(args.manifest))
+    return 1 if manifest['counts']['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+# solver benchmark, synthetic takes with ground truth and per stage timings
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from .dataRead import jointList
+from .bulkRead import cameraBulkLoad, trackerBulkLoad
+from .markerIndex import MarkerIndex
+from .multiCamera import solveRangeMulti, multiCrossCheck, solveMulti
+from .vectorTriangulate import eulerMatrices, lineCrossFrames
+from .solver import solveRange, solveQueue, solveChain, solve, solveScalar
+from .solveExport import solveWrite
+from .trackData import PRECISIONS
+from .cameraModel import CAMERA_MODELS, CameraIntrinsics
+from .precisionReport import solveDifference
+
+STAGES = ('parse', 'matching', 'triangulation', 'export')
+
+def syntheticTake(directory, joints=5, markers=2, frames=500, occlusion=0.1, cameras=2,
+                  seed=0, start=1, model='angles'):
+
+    '''Writes a synthetic take to directory: camN_CAMERAexport.txt and
+    camN_TRACKERexport.txt per camera in the Blender exporters' format, and the
+    ground truth of every joint as groundTruth.npy.  Cameras stand in a ring
+    around the joints with a little handheld drift.  Marker .01 sits on the joint,
+    further markers are offset from it, and every marker is hidden from each
+    camera on a frame at the occlusion rate, so joints switch markers, cross
+    different markers per camera and drop switches with nothing to chain onto.
+    Tracks are projected under the camera model, angles or pinhole.
+    Returns (camPaths, trackPaths, joint names, (J, F, 3) ground truth).'''
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    names = ["joint{:02d}".format(j) for j in range(joints)]
+    frameNumbers = np.arange(start, start + frames)
+    t = np.arange(frames, dtype='float64')[:, None]
+
+    # joints wander smoothly around the middle of the ring
+    centres = rng.uniform(-0.5, 0.5, (joints, 1, 3)) + (0, 0, 1)
+    rates = rng.uniform(0.01, 0.05, (joints, 1, 3))
+    phases = rng.uniform(0, 2 * math.pi, (joints, 1, 3))
+    truth = centres + 0.4 * np.sin(t[None] * rates + phases)
+    offsets = np.concatenate((np.zeros((1, joints, 1, 3)),
+                              rng.uniform(-0.02, 0.02, (markers - 1, joints, 1, 3))))
+
+    aov = (0.8, 0.8 * 1080 / 1920)
+    intrinsics = CameraIntrinsics(35.0, (36.0, 20.25), (1920, 1080))
+    camPaths = []
+    trackPaths = []
+    for c in range(cameras):
+        angle = 2 * math.pi * c / cameras
+        drift = 0.01 * np.sin(t * rng.uniform(0.02, 0.1, 6) + rng.uniform(0, 2 * math.pi, 6))
+        origins = np.array((6 * math.sin(angle), -6 * math.cos(angle), 1.5)) + drift[:, :3]
+        rotations = np.array((math.radians(85), 0, angle)) + drift[:, 3:]
+        matrices = eulerMatrices(rotations)
+
+        camPaths.append(os.path.join(directory, "cam{}_CAMERAexport.txt".format(c + 1)))
+        with open(camPaths[-1], "w") as EXPORT:
+            EXPORT.write("CAMERA DATA EXPORT for synthetic{}\n\n".format(c + 1))
+            EXPORT.write("RANGE {} to {}\n\n".format(start, start + frames - 1))
+            EXPORT.write("RESOLUTION 1920 x 1080\n\n")
+            EXPORT.write("SENSOR(mm) 36.0 x 20.25\n\n")
+            EXPORT.write("LENS(mm) 35.0\n\n")
+            EXPORT.write("ANGLE OF VIEW(radians) {} x {}\n\n\n".format(*aov))
+            EXPORT.write("".join("{:05d} {:6f} {:6f} {:6f} {:6f} {:6f} {:6f}\n".format(frame, *row)
+                                 for frame, row in zip(frameNumbers.tolist(),
+                                                       np.hstack((origins, rotations)).tolist())))
+
+        trackPaths.append(os.path.join(directory, "cam{}_TRACKERexport.txt".format(c + 1)))
+        with open(trackPaths[-1], "w") as EXPORT:
+            EXPORT.write("TRACKER DATA EXPORT for synthetic{}\n\n".format(c + 1))
+            EXPORT.write("RANGE {} to {}\n\n".format(start, start + frames - 1))
+            EXPORT.write("RESOLUTION 1920 x 1080\n\n")
+            EXPORT.write("NUMBER OF TRACKS {}\n\n".format(joints * markers))
+            for j, joint in enumerate(names):
+                for m in range(markers):
+                    # camera space ray to the marker, inverse of localRays
+                    rays = np.einsum('nji,nj->ni', matrices, truth[j] + offsets[m, j] - origins)
+                    rays /= np.linalg.norm(rays, axis=1)[:, None]
+                    if model == 'pinhole':
+                        trackPos = intrinsics.project(rays)
+                    else:
+                        trackPos = np.column_stack((np.arcsin(rays[:, 0]) / aov[0] + 0.5,
+                                                    np.arctan2(rays[:, 1], -rays[:, 2]) / aov[1]
+                                                    + 0.5))
+                    tracked = rng.random(frames) >= occlusion
+                    EXPORT.write("\n##### {}.{:02d}\n".format(joint, m + 1) +
+                                 "".join("{:05d} {:6f} {:6f}\n".format(frame, x, y)
+                                         for frame, (x, y) in zip(frameNumbers[tracked].tolist(),
+                                                                  trackPos[tracked].tolist())))
+
+    np.save(os.path.join(directory, "groundTruth.npy"), truth)
+    return camPaths, trackPaths, names, truth
+
+def _stages(camPaths, trackPaths, exportPath, scalar, mark, dtype='float64', model='angles'):
+
+    '''Runs every stage of a solve, calling mark(stage) as each one finishes.
+    Returns (EXPORT, trackRange).'''
+
+    cams = [cameraBulkLoad(open(camPath, "rb"), dtype=dtype) for camPath in camPaths]
+    tracks = [trackerBulkLoad(open(trackPath, "rb"), dtype=dtype) for trackPath in trackPaths]
+    mark('parse')
+
+    if len(cams) > 2:
+        trackRange = solveRangeMulti(cams, tracks)
+        frames = np.arange(trackRange[0], trackRange[1] + 1)
+        for joint in jointList(*tracks):
+            multiCrossCheck(cams, tracks, joint, frames)
+        mark('matching')
+        # solveMulti picks its markers again, so this includes a second matching pass
+        EXPORT = solveMulti(cams, tracks, model=model)
+        mark('triangulation')
+    else:
+        camA, camB = cams
+        trackA, trackB = tracks
+        trackRange = solveRange(camA, camB, trackA, trackB)
+        joints = jointList(trackA, trackB)
+        index = MarkerIndex(trackA, trackB, joints, trackRange)
+        checks, markersA, markersB, frames = solveQueue(index, joints)
+        mark('matching')
+        if scalar:
+            from .triangulate import lineCross
+            crossed = np.array([lineCross(markerA, markerB, frame, camA, camB, trackA, trackB)
+                                for markerA, markerB, frame in zip(markersA, markersB, frames)],
+                               dtype='float64').reshape(-1, 4)
+        else:
+            crossed = lineCrossFrames(markersA, markersB, frames, camA, camB, trackA, trackB,
+                                      model)
+        EXPORT = solveChain(checks, crossed)
+        mark('triangulation')
+
+    with open(exportPath, "w") as dataFile:
+        solveWrite(dataFile, EXPORT, [cam['clip'] for cam in cams], trackRange)
+    mark('export')
+
+    return EXPORT, trackRange
+
+def solveAccuracy(EXPORT, joints, truth, trackRange, first=1):
+
+    '''Error of a solve against ground truth of shape (J, F, 3) starting at frame
+    first.  Returns {joint: {'coverage', 'rms', 'max'}} plus an 'all' entry.'''
+
+    accuracy = {}
+    errors = []
+    for j, joint in enumerate(joints):
+        solved = EXPORT.get(joint, {})
+        frames = np.fromiter(solved, dtype='int64', count=len(solved))
+        if not len(frames):
+            accuracy[joint] = {'coverage': 0.0, 'rms': None, 'max': None}
+            continue
+        points = np.array([point[:3] for point in solved.values()], dtype='float64')
+        error = np.linalg.norm(points - truth[j, frames - first], axis=1)
+        errors.append(error)
+        accuracy[joint] = {'coverage': len(frames) / (trackRange[1] - trackRange[0] + 1),
+                           'rms': float(np.sqrt(np.mean(error ** 2))),
+                           'max': float(error.max())}
+
+    error = np.concatenate(errors) if errors else np.zeros(0)
+    accuracy['all'] = {'coverage': len(error) / max(1, len(joints) *
+                                                    (trackRange[1] - trackRange[0] + 1)),
+                       'rms': float(np.sqrt(np.mean(error ** 2))) if len(error) else None,
+                       'max': float(error.max()) if len(error) else None}
+    return accuracy
+
+def benchmarkTake(camPaths, trackPaths, exportPath, truth=None, joints=None, first=1,
+                  scalar=False, memory=True, dtype='float64', model='angles'):
+
+    '''Times each stage of solving a take: parse, marker matching, triangulation and
+    export.  With memory set the take is solved a second time under tracemalloc for
+    the peak memory of each stage.  scalar triangulates with the original lineCross.
+    truth of shape (J, F, 3) from frame first adds accuracy.
+    dtype is the precision the exports are parsed and solved in, model the camera
+    model tracks are projected with (scalar only has angles).
+    Returns dictionary of results.'''
+
+    seconds = {}
+    clock = [time.perf_counter()]
+
+    def timeStage(stage):
+        now = time.perf_counter()
+        seconds[stage] = now - clock[0]
+        clock[0] = now
+
+    EXPORT, trackRange = _stages(camPaths, trackPaths, exportPath, scalar, timeStage, dtype,
+                                 model)
+    frames = trackRange[1] - trackRange[0] + 1
+    total = sum(seconds.values())
+    results = {'cameras': len(camPaths), 'frames': frames, 'precision': dtype,
+               'joint_frames': sum(len(solved) for solved in EXPORT.values()),
+               'seconds': seconds, 'total_seconds': total,
+               'frames_per_s': frames / total if total else None,
+               'joint_frames_per_s': sum(len(solved) for solved in EXPORT.values()) / total
+                                     if total else None}
+
+    if memory:
+        peaks = {}
+
+        def peakStage(stage):
+            peaks[stage] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.reset_peak()
+
+        tracemalloc.start()
+        try:
+            _stages(camPaths, trackPaths, exportPath, scalar, peakStage, dtype, model)
+        finally:
+            tracemalloc.stop()
+        results['peak_mb'] = peaks
+
+    if truth is not None:
+        results['accuracy'] = solveAccuracy(EXPORT, joints or list(EXPORT), truth, trackRange,
+                                            first)
+
+    return results
+
+def scalarComparison(camPaths, trackPaths, truth=None, joints=None, first=1):
+
+    '''Solves a 2 camera take with solveScalar (the original lineCross per joint
+    frame) and with the vectorized solve, timing both and measuring how far
+    apart their points are, plus the accuracy of each given truth as in
+    benchmarkTake.  Returns dictionary of results.'''
+
+    camA, camB = [cameraBulkLoad(open(camPath, "rb")) for camPath in camPaths]
+    trackA, trackB = [trackerBulkLoad(open(trackPath, "rb")) for trackPath in trackPaths]
+    results = {}
+    solves = {}
+    for name, solver in (('scalar', solveScalar), ('vectorized', solve)):
+        begin = time.perf_counter()
+        solves[name] = solver(camA, camB, trackA, trackB)
+        results[name + '_seconds'] = time.perf_counter() - begin
+    results['difference'] = solveDifference(solves['vectorized'], solves['scalar'])['all']
+
+    if truth is not None:
+        trackRange = solveRange(camA, camB, trackA, trackB)
+        for name, EXPORT in solves.items():
+            results[name + '_accuracy'] = solveAccuracy(EXPORT, joints or list(EXPORT), truth,
+                                                        trackRange, first)['all']
+    return results
+
+def scalarReport(results, FILE=sys.stdout):
+
+    '''Prints a scalarComparison's results.'''
+
+    difference = results['difference']
+    FILE.write("scalar        {:>9.3f} s  vectorized {:.3f} s, points apart by rms {:.2e}, "
+               "max {:.2e}, {} frames solved by only one\n".format(
+                   results['scalar_seconds'], results['vectorized_seconds'],
+                   difference['rms'] or 0, difference['max'] or 0,
+                   difference['missing'] + difference['extra']))
+    if 'scalar_accuracy' in results:
+        FILE.write("accuracy      scalar rms error {:.2e}, max {:.2e}; vectorized rms error "
+                   "{:.2e}, max {:.2e}\n".format(
+                       results['scalar_accuracy']['rms'] or 0,
+                       results['scalar_accuracy']['max'] or 0,
+                       results['vectorized_accuracy']['rms'] or 0,
+                       results['vectorized_accuracy']['max'] or 0))
+
+# what a fresh interpreter runs, timing the import and listing what it loaded
+_IMPORT_TIMER = ("import sys, time; begin = time.perf_counter(); import {}; "
+                 "print(time.perf_counter() - begin); print(' '.join(sys.modules))")
+
+def coldStart(module='mocapSolver', runs=5):
+
+    '''Median time of fresh interpreters importing module, both the whole process
+    and the import alone, next to a bare interpreter and one importing NumPy,
+    plus the modules outside the standard library the import loaded.
+    Returns dictionary of results.'''
+
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (root, env.get('PYTHONPATH'))))
+
+    def run(code):
+        begin = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        return time.perf_counter() - begin, output.splitlines()
+
+    results = {'module': module, 'runs': runs}
+    results['interpreter_s'] = statistics.median(run("pass")[0] for r in range(runs))
+    for name, key in (('numpy', 'numpy'), (module, 'module')):
+        timings = [run(_IMPORT_TIMER.format(name)) for r in range(runs)]
+        results[key + '_s'] = statistics.median(seconds for seconds, output in timings)
+        results[key + '_import_s'] = statistics.median(float(output[0])
+                                                       for seconds, output in timings)
+    loaded = {name.split('.')[0] for name in timings[-1][1][1].split()}
+    results['third_party'] = sorted(loaded - set(sys.stdlib_module_names) -
+                                    {module.split('.')[0], '__main__', '_distutils_hack'})
+    return results
+
+def coldStartReport(results, FILE=sys.stdout):
+
+    '''Prints a coldStart's results.'''
+
+    FILE.write("cold start    {:>9.3f} s  python, {:.3f} s with numpy, {:.3f} s with {} "
+               "({:.3f} s importing it)\n".format(
+                   results['interpreter_s'], results['numpy_s'], results['module_s'],
+                   results['module'], results['module_import_s']))
+    FILE.write("imports       {}\n".format(", ".join(results['third_party']) or "nothing"))
+
+def report(results, FILE=sys.stdout):
+
+    '''Prints a benchmark's results as a table.'''
+
+    FILE.write("{} frames, {} cameras, {} joint frames solved in {}\n".format(
+        results['frames'], results['cameras'], results['joint_frames'], results['precision']))
+    for stage in STAGES:
+        line = "{:<14}{:>9.3f} s".format(stage, results['seconds'][stage])
+        if 'peak_mb' in results:
+            line += "{:>10.1f} MB peak".format(results['peak_mb'][stage])
+        FILE.write(line + "\n")
+    FILE.write("{:<14}{:>9.3f} s  {:.0f} frames/s, {:.0f} joint frames/s\n".format(
+        "total", results['total_seconds'], results['frames_per_s'],
+        results['joint_frames_per_s']))
+    if 'accuracy' in results:
+        accuracy = results['accuracy']['all']
+        FILE.write("accuracy      {:.1%} coverage, rms error {:.2e}, max error {:.2e}\n".format(
+            accuracy['coverage'], accuracy['rms'] or 0, accuracy['max'] or 0))
+
+def main(argv=None):
+
+    '''Generates a synthetic take and benchmarks solving it.'''
+
+    parser = argparse.ArgumentParser(prog="mocapSolver.benchmark",
+                                     description="Benchmarks the solver on a synthetic take "
+                                                 "with known ground truth.")
+    parser.add_argument("--joints", type=int, default=20)
+    parser.add_argument("--markers", type=int, default=2, help="markers per joint")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--occlusion", type=float, default=0.1,
+                        help="chance of each camera losing each marker on a frame")
+    parser.add_argument("--cameras", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scalar", action="store_true",
+                        help="triangulate with the original per frame lineCross")
+    parser.add_argument("--compare-scalar", action="store_true",
+                        help="also solve with the original per frame lineCross and the "
+                             "vectorized solve and compare their points and accuracy (2 "
+                             "cameras only)")
+    parser.add_argument("--camera-model", choices=CAMERA_MODELS, default='angles',
+                        help="project the synthetic tracks with and solve under this model")
+    parser.add_argument("--precision", choices=PRECISIONS, default='float64',
+                        help="parse and solve in this precision, float32 moves points by "
+                             "around 1e-5, well inside the solve's own error")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the traced pass measuring peak memory")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="also time fresh interpreters importing the package")
+    parser.add_argument("--keep", help="directory to write the synthetic take to and keep")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.compare_scalar and args.cameras != 2:
+        parser.error("--compare-scalar only compares 2 camera solves")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.keep or scratch
+        camPaths, trackPaths, joints, truth = syntheticTake(directory, args.joints, args.markers,
+                                                            args.frames, args.occlusion,
+                                                            args.cameras, args.seed,
+                                                            model=args.camera_model)
+        results = benchmarkTake(camPaths, trackPaths, os.path.join(directory, "mocapSolved.txt"),
+                                truth, joints, scalar=args.scalar, memory=args.memory,
+                                dtype=args.precision, model=args.camera_model)
+        if args.compare_scalar:
+            results['scalar_comparison'] = scalarComparison(camPaths, trackPaths, truth, joints)
+
+    if args.cold_start:
+        results['cold_start'] = coldStart()
+
+    report(results)
+    if 'scalar_comparison' in results:
+        scalarReport(results['scalar_comparison'])
+    if 'cold_start' in results:
+        coldStartReport(results['cold_start'])
+    if args.json:
+        with open(args.json, "w") as FILE:
+            json.dump(results, FILE, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# bulk loader for camera and tracker exports, parses whole numeric blocks at once
+
+import mmap
+import time
+import numpy as np
+
+from .trackData import CameraData, MarkerData, TrackerData
+
+SECTION = b"\n##### "
+
+# header lines each export needs, with the number of words after the key
+CAMERA_HEADER = {'EXPORT': 0, 'RANGE': 3, 'RESOLUTION': 3, 'SENSOR(mm)': 3, 'LENS(mm)': 1,
+                 'ANGLE': 5}
+TRACKER_HEADER = {'EXPORT': 0, 'RANGE': 3, 'RESOLUTION': 3, 'NUMBER': 3}
+
+def _mapFile(EXPORT_FILE):
+
+    '''Memory-maps an open export file read-only and closes the file object.'''
+
+    try:
+        return mmap.mmap(EXPORT_FILE.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        EXPORT_FILE.close()
+
+def _headerRead(mapped, end):
+
+    '''Reads the "KEY value" header lines before offset end.
+    Returns dictionary of {first word: remaining words}.'''
+
+    header = {}
+    for line in mapped[:end].decode().splitlines():
+        split = line.split()
+        if split:
+            if "EXPORT" in split and " for " in line:
+                header['EXPORT'] = line.split(" for ", 1)[1].rstrip("\r\n")
+            else:
+                header[split[0]] = split[1:]
+    return header
+
+def _headerCheck(header, required, path):
+
+    '''Raises ValueError naming the export and the first required header line
+    (see CAMERA_HEADER) that is missing or too short.'''
+
+    for key, words in required.items():
+        if key not in header:
+            raise ValueError("{}: export header has no {} line".format(path, key))
+        if len(header[key]) < words:
+            raise ValueError("{}: malformed {} line in the export header".format(path, key))
+
+def _blockRead(mapped, start, end, width, dtype='float64', path="export"):
+
+    '''Parses all rows between 2 offsets in one go, raising ValueError naming the
+    export and the byte offset of the first row that doesn't parse into width
+    numbers.  Returns (N, width) array.'''
+
+    block = mapped[start:end]
+    # fromstring stops quietly at the first token it can't parse, so count the
+    # rows between the first and last non-blank byte to check it read them all
+    first = 0
+    while first < len(block) and block[first] in b" \t\r\n":
+        first += 1
+    last = len(block)
+    while last > first and block[last - 1] in b" \t\r\n":
+        last -= 1
+    rows = block.count(b"\n", first, last) + 1 if last > first else 0
+
+    try:
+        values = np.fromstring(block, dtype=dtype, sep=" ")
+    except ValueError:
+        # newer numpy raises instead of stopping, without saying where
+        values = None
+    if values is None or len(values) != rows * width:
+        raise ValueError("{}: malformed export row at byte {}".format(
+            path, start + _badRow(block, first, last, width)))
+    return values.reshape(-1, width)
+
+def _badRow(block, first, last, width):
+
+    '''Offset of the first row between first and last in block that isn't width
+    numbers, row by row, only once the block failed to parse.'''
+
+    offset = first
+    for line in block[first:last].split(b"\n"):
+        try:
+            if len([float(value) for value in line.split()]) != width:
+                return offset
+        except ValueError:
+            return offset
+        offset += len(line) + 1
+    return first
+
+def _firstRow(mapped, start):
+
+    '''Offset of the first line after start beginning with a frame number,
+    negative frames included.'''
+
+    offset = start
+    while offset < len(mapped):
+        end = mapped.find(b"\n", offset)
+        end = len(mapped) if end == -1 else end + 1
+        lead = mapped[offset:offset + 2]
+        if lead[:1].isdigit() or (lead[:1] == b"-" and lead[1:].isdigit()):
+            return offset
+        offset = end
+    return offset
+
+def _record(stats, size, begin):
+
+    '''Fills a stats dictionary with parse throughput.'''
+
+    if stats is not None:
+        seconds = time.perf_counter() - begin
+        stats['bytes'] = size
+        stats['seconds'] = seconds
+        stats['mb_per_s'] = size / 1e6 / seconds if seconds else float('inf')
+
+def cameraBulkLoad(CAMERA_FILE, stats=None, dtype='float64'):
+
+    '''Reads blender camera data export files into CameraData, parsing all
+    keyframe rows in one pass into dtype.  Optional stats dict receives MB/s
+    throughput.'''
+
+    begin = time.perf_counter()
+    path = getattr(CAMERA_FILE, 'name', "camera export")
+    mapped = _mapFile(CAMERA_FILE)
+    try:
+        # header ends at the first keyframe row
+        offset = _firstRow(mapped, max(mapped.find(b"ANGLE OF VIEW"), 0))
+        header = _headerRead(mapped, offset)
+        _headerCheck(header, CAMERA_HEADER, path)
+        data = _blockRead(mapped, offset, len(mapped), 7, dtype, path)
+        size = len(mapped)
+    finally:
+        mapped.close()
+
+    camera = CameraData(clip=header['EXPORT'],
+                        frameRange=(int(header['RANGE'][0]), int(header['RANGE'][2])),
+                        resolution=(int(header['RESOLUTION'][0]),
+                                    int(header['RESOLUTION'][2])),
+                        sensor=(float(header['SENSOR(mm)'][0]),
+                                float(header['SENSOR(mm)'][2])),
+                        lens=float(header['LENS(mm)'][0]),
+                        aov=(float(header['ANGLE'][2]), float(header['ANGLE'][4])),
+                        data=data, dtype=dtype)
+    _record(stats, size, begin)
+    return camera
+
+def trackerSections(mapped):
+
+    '''Finds every "##### marker" section of a mapped tracker export.
+    Returns list of (marker, first row offset, end offset).'''
+
+    sections = []
+    offset = mapped.find(SECTION)
+    while offset != -1:
+        nameStart = offset + len(SECTION)
+        nameEnd = mapped.find(b"\n", nameStart)
+        nameEnd = len(mapped) if nameEnd == -1 else nameEnd
+        following = mapped.find(SECTION, nameEnd)
+        end = len(mapped) if following == -1 else following
+        sections.append((mapped[nameStart:nameEnd].decode().strip(), nameEnd, end))
+        offset = following
+    return sections
+
+def trackerBulkLoad(TRACKER_FILE, stats=None, dtype='float64'):
+
+    '''Reads blender tracker data export files into TrackerData, parsing each
+    marker section in one pass into dtype.  Optional stats dict receives MB/s
+    throughput.'''
+
+    begin = time.perf_counter()
+    path = getattr(TRACKER_FILE, 'name', "tracker export")
+    mapped = _mapFile(TRACKER_FILE)
+    try:
+        sections = trackerSections(mapped)
+        header = _headerRead(mapped, max(mapped.find(SECTION), 0) if sections else len(mapped))
+        _headerCheck(header, TRACKER_HEADER, path)
+        markers = {}
+        for name, start, end in sections:
+            rows = _blockRead(mapped, start, end, 3, dtype, path)
+            markers[name] = MarkerData.fromRows(name, rows[:, 0].astype('int64'), rows[:, 1:],
+                                                dtype)
+        size = len(mapped)
+    finally:
+        mapped.close()
+
+    tracker = TrackerData(clip=header['EXPORT'],
+                          frameRange=(int(header['RANGE'][0]), int(header['RANGE'][2])),
+                          resolution=(int(header['RESOLUTION'][0]),
+                                      int(header['RESOLUTION'][2])),
+                          trackNum=int(header['NUMBER'][-1]),
+                          markers=markers)
+    _record(stats, size, begin)
+    return tracker
@@ -0,0 +1,78 @@
+# camera intrinsics, pinhole rays through normalized track positions from the export headers
+
+import math
+import numpy as np
+
+# 'angles' nudges the camera by the angle of view like angleOfViewCalc, 'pinhole'
+# projects through the lens and sensor
+CAMERA_MODELS = ('angles', 'pinhole')
+
+class CameraIntrinsics:
+
+    '''Pinhole model of a camera export, built once from its lens, sensor and
+    resolution headers.  The image plane at unit distance in front of the camera
+    is sensor width / lens wide and as high as the clip's aspect makes it (the
+    camera exporter derives the sensor height the same way).'''
+
+    __slots__ = ('lens', 'sensor', 'resolution', 'plane')
+
+    def __init__(self, lens, sensor, resolution):
+        self.lens = float(lens)
+        self.sensor = (float(sensor[0]), float(sensor[1]))
+        self.resolution = (int(resolution[0]), int(resolution[1]))
+        width = self.sensor[0] / self.lens
+        self.plane = (width, width * self.resolution[1] / self.resolution[0])
+
+    @classmethod
+    def fromCamera(cls, cam):
+
+        '''Intrinsics of a camera export, CameraData or a cameraRead dictionary.'''
+
+        return cls(cam['lens'], cam['sensor'], cam['resolution'])
+
+    def __repr__(self):
+        return "CameraIntrinsics(lens={}, sensor={}, resolution={})".format(
+            self.lens, self.sensor, self.resolution)
+
+    @property
+    def aov(self):
+
+        '''Horizontal and vertical angle of view in radians.'''
+
+        return (2 * math.atan(self.plane[0] / 2), 2 * math.atan(self.plane[1] / 2))
+
+    def rays(self, trackPos):
+
+        '''Camera-space unit direction through each normalized (N, 2) track position,
+        looking down -Z with X right and Y up.  Returns (N, 3) array in trackPos'
+        precision.'''
+
+        trackPos = np.asarray(trackPos)
+        if trackPos.dtype != np.float32:
+            trackPos = trackPos.astype('float64', copy=False)
+        plane = np.asarray(self.plane, dtype=trackPos.dtype)
+        rays = np.stack(((trackPos[..., 0] - 0.5) * plane[0],
+                         (trackPos[..., 1] - 0.5) * plane[1],
+                         -np.ones(trackPos.shape[:-1], dtype=trackPos.dtype)), axis=-1)
+        return rays / np.linalg.norm(rays, axis=-1, keepdims=True)
+
+    def project(self, rays):
+
+        '''Normalized track positions of (N, 3) camera-space directions, the inverse
+        of rays.  Returns (N, 2) array.'''
+
+        rays = np.asarray(rays, dtype='float64')
+        depth = -rays[..., 2]
+        return np.stack((rays[..., 0] / depth / self.plane[0] + 0.5,
+                         rays[..., 1] / depth / self.plane[1] + 0.5), axis=-1)
+
+def cameraLens(cam, model='angles'):
+
+    '''What rayDirections takes for a camera export under a camera model: its
+    (x, y) angle of view, or its CameraIntrinsics.'''
+
+    if model == 'pinhole':
+        return CameraIntrinsics.fromCamera(cam)
+    if model != 'angles':
+        raise ValueError("camera model must be one of {}, not {!r}".format(CAMERA_MODELS, model))
+    return np.array(cam['aov'], dtype='float64')
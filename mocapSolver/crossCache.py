@@ -0,0 +1,44 @@
+# bounded memo of line crossings, shares each (markers, frame) crossing across marker switches
+
+from collections import OrderedDict
+
+class CrossCache:
+
+    '''Least recently used cache of cross(markerA, markerB, frame) results, keyed
+    by (markerA, markerB, frame) and holding at most maxsize of them.  A marker
+    switch crosses its markers on the frame before, which the frame before has
+    usually just crossed itself.'''
+
+    __slots__ = ('cross', 'maxsize', 'entries', 'hits', 'misses')
+
+    def __init__(self, cross, maxsize=1024):
+        self.cross = cross
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, markerA, markerB, frame):
+        key = (markerA, markerB, frame)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        result = self.cross(markerA, markerB, frame)
+        self.misses += 1
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+
+        '''Empties the cache and its hit and miss counts.'''
+
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,89 @@
+# reads camera and tracker data exported from supported applications
+
+def cameraRead(CAMERA_FILE):
+
+    '''Reads blender camera data export files.'''
+
+    cameraTrack = {}
+
+    for c, line in enumerate(CAMERA_FILE):
+        if c == 0:
+            cameraTrack['clip'] = line[23:-1]
+        elif c == 2:
+            split = line[:-1].split(" ")
+            cameraTrack['frame_range'] = (split[1], split[3])
+        elif c == 4:
+            split = line[:-1].split(" ")
+            cameraTrack['resolution'] = (split[1], split[3])
+        elif c == 6:
+            split = line[:-1].split(" ")
+            cameraTrack['sensor'] = (split[1], split[3])
+        elif c == 8:
+            split = line[:-1].split(" ")
+            cameraTrack['lens'] = split[1]
+        elif c == 10:
+            split = line[:-1].split(" ")
+            cameraTrack['aov'] = (split[3], split[5])
+        elif c > 12:
+            split = line[:-1].split(" ")
+            cameraTrack[int(split[0])] = (split[1], split[2], split[3],
+                                          split[4], split[5], split[6])
+
+    CAMERA_FILE.close()
+    return cameraTrack
+
+def trackerRead(TRACKER_FILE):
+
+    '''Reads blender tracker data export files.'''
+
+    trackTrack = {}
+
+    for t, line in enumerate(TRACKER_FILE):
+        if t == 0:
+            trackTrack['clip'] = line[24:-1]
+        elif t == 2:
+            split = line[:-1].split(" ")
+            trackTrack['frame_range'] = (split[1], split[3])
+        elif t == 4:
+            split = line[:-1].split(" ")
+            trackTrack['resolution'] = (split[1], split[3])
+        elif t == 6:
+            split = line[:-1].split(" ")
+            trackTrack['track_num'] = split[1]
+        elif t > 8:
+            split = line[:-1].split(" ")
+            if split[0] == "#####":
+                currentMarker = split[1]
+                trackTrack[currentMarker] = {}
+            else:
+                try:
+                    trackTrack[currentMarker][int(split[0])] = (split[1], split[2])
+                except IndexError:
+                    pass
+
+    TRACKER_FILE.close()
+    return trackTrack
+
+TRACKER_HEADERS = ('clip', 'frame_range', 'resolution', 'track_num')
+
+def markerList(*tracks):
+
+    '''Lists the markers of tracker exports in the order they were read.'''
+
+    markers = []
+    for track in tracks:
+        for marker in track:
+            if marker not in TRACKER_HEADERS and marker not in markers:
+                markers.append(marker)
+    return markers
+
+def jointList(*tracks):
+
+    '''Lists the joints named by tracker export markers ('joint.##').'''
+
+    joints = []
+    for marker in markerList(*tracks):
+        joint = marker.split(".")[0]
+        if joint not in joints:
+            joints.append(joint)
+    return joints
@@ -0,0 +1,248 @@
+# incremental re-solve, only re-triangulates joint frames whose exports changed
+
+import hashlib
+import json
+import os
+import numpy as np
+
+from .dataRead import markerList, jointList
+from .markerIndex import MarkerIndex
+from .trackData import TrackerData
+from .vectorTriangulate import cameraArrays, trackArrays, lineCrossFrames
+from .solver import solveRange, solveQueue, solveChain, loadTake
+from .solveExport import solveWrite
+from .solveBinary import binaryPath, binaryCurrent, binaryRead, binaryWrite, solveArrays
+from .residuals import residualArrays, residualPath, residualWrite
+
+CACHE_VERSION = 2
+
+def solveCachePath(exportPath):
+
+    '''mocapSolved.cache.npz path alongside a mocapSolved.txt path.'''
+
+    if exportPath.endswith(".txt"):
+        exportPath = exportPath[:-4]
+    return exportPath + ".cache.npz"
+
+def frameHashes(frames, values, trackRange):
+
+    '''64-bit hash of each frame's row over the solve range, 0 where the row
+    is missing.  Returns (F,) uint64 array.'''
+
+    first = int(trackRange[0])
+    count = int(trackRange[1]) - first + 1
+    frames = np.asarray(frames, dtype='int64')
+    bits = np.ascontiguousarray(values, dtype='float64').view('uint64').reshape(len(frames), -1)
+
+    # FNV style mix of the frame and every value's bit pattern, never 0
+    mixed = np.full(len(frames), 0xCBF29CE484222325, dtype='uint64')
+    for column in [frames.astype('uint64')] + list(bits.T):
+        mixed = (mixed ^ column) * np.uint64(0x100000001B3)
+    mixed |= np.uint64(1)
+
+    hashes = np.zeros(count, dtype='uint64')
+    inside = (frames >= first) & (frames < first + count)
+    hashes[frames[inside] - first] = mixed[inside]
+    return hashes
+
+def cameraFingerprint(cam, trackRange):
+
+    '''Per-frame hashes of a camera export's transforms over the solve range.'''
+
+    frames = np.arange(int(trackRange[0]), int(trackRange[1]) + 1)
+    origins, rotations = cameraArrays(cam, frames.tolist())
+    return frameHashes(frames, np.column_stack((origins, rotations)), trackRange)
+
+def trackerFingerprint(track, markers, trackRange):
+
+    '''Per-frame hashes of every marker section over the solve range.
+    Returns (M, F) uint64 array, one row per marker.'''
+
+    count = int(trackRange[1]) - int(trackRange[0]) + 1
+    hashes = np.zeros((len(markers), count), dtype='uint64')
+    for m, marker in enumerate(markers):
+        if isinstance(track, TrackerData):
+            data = track.markers[marker]
+            frames = data.frames[data.valid]
+            positions = data.co[data.valid]
+        else:
+            frames = np.array(sorted(track[marker]), dtype='int64')
+            positions = trackArrays(track, [marker] * len(frames), frames.tolist())
+        hashes[m] = frameHashes(frames, positions, trackRange)
+    return hashes
+
+def sectionDigests(hashes):
+
+    '''Content digest of each row of a fingerprint, to skip unchanged sections.'''
+
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest() for row in hashes]
+
+def takeFingerprint(camA, camB, trackA, trackB):
+
+    '''Everything a solve depends on, hashed.  Returns (meta, arrays) for the cache.'''
+
+    trackRange = solveRange(camA, camB, trackA, trackB)
+    markersA = markerList(trackA)
+    markersB = markerList(trackB)
+    hashesA = trackerFingerprint(trackA, markersA, trackRange)
+    hashesB = trackerFingerprint(trackB, markersB, trackRange)
+
+    meta = {'version': CACHE_VERSION, 'clips': [camA['clip'], camB['clip']],
+            'frame_range': list(trackRange),
+            'aov': [[float(a) for a in camA['aov']], [float(b) for b in camB['aov']]],
+            'markers': [markersA, markersB],
+            'digests': [sectionDigests(hashesA), sectionDigests(hashesB)]}
+    arrays = {'cameraA': cameraFingerprint(camA, trackRange),
+              'cameraB': cameraFingerprint(camB, trackRange),
+              'trackA': hashesA, 'trackB': hashesB}
+    return meta, arrays
+
+def cacheWrite(cachePath, meta, arrays, EXPORT):
+
+    '''Saves a take's fingerprint and solved results for the next incremental solve.'''
+
+    joints, positions, valid = solveArrays(EXPORT, meta['frame_range'])
+    residuals = residualArrays(EXPORT, meta['frame_range'])[1]
+    meta = dict(meta, joints=joints)
+    temporary = cachePath + ".tmp.npz"
+    np.savez(temporary, meta=np.array(json.dumps(meta)), positions=positions, valid=valid,
+             residuals=residuals, **arrays)
+    os.replace(temporary, cachePath)
+
+def cacheRead(cachePath):
+
+    '''Loads a solve cache.  Returns (meta, arrays) or None if there isn't a usable one.'''
+
+    if not os.path.exists(cachePath):
+        return None
+    with np.load(cachePath, allow_pickle=False) as cache:
+        meta = json.loads(str(cache['meta']))
+        if meta.get('version') != CACHE_VERSION:
+            return None
+        arrays = {key: cache[key] for key in cache.files if key != 'meta'}
+    return meta, arrays
+
+def changedFrames(meta, arrays, cached, cachedArrays, joint):
+
+    '''Frames of the range where any input of a joint differs from the cache.'''
+
+    changed = (arrays['cameraA'] != cachedArrays['cameraA']) | \
+              (arrays['cameraB'] != cachedArrays['cameraB'])
+
+    for side, key in ((0, 'trackA'), (1, 'trackB')):
+        before = dict(zip(cached['markers'][side], range(len(cached['markers'][side]))))
+        for m, marker in enumerate(meta['markers'][side]):
+            if marker.split(".")[0] != joint:
+                continue
+            if marker not in before:
+                changed |= arrays[key][m] != 0
+            elif meta['digests'][side][m] != cached['digests'][side][before[marker]]:
+                changed |= arrays[key][m] != cachedArrays[key][before[marker]]
+        # markers that have gone away
+        for marker, c in before.items():
+            if marker.split(".")[0] == joint and marker not in meta['markers'][side]:
+                changed |= cachedArrays[key][c] != 0
+
+    return changed
+
+def solveIncremental(camA, camB, trackA, trackB, cache, joints=None):
+
+    '''Re-solves only the joint frames whose inputs changed since the cached solve.
+    Returns (EXPORT, fingerprint meta, fingerprint arrays, re-solved joint frames).'''
+
+    meta, arrays = takeFingerprint(camA, camB, trackA, trackB)
+    trackRange = tuple(meta['frame_range'])
+    if joints is None:
+        joints = jointList(trackA, trackB)
+
+    cached, cachedArrays = cache if cache else ({}, {})
+    reusable = (cached.get('frame_range') == meta['frame_range'] and
+                cached.get('aov') == meta['aov'])
+    cachedJoints = cached.get('joints', []) if reusable else []
+
+    index = MarkerIndex(trackA, trackB, joints, trackRange)
+    masks = {}
+    previous = {}
+    for joint in joints:
+        if joint not in cachedJoints:
+            previous[joint] = {}
+            continue
+        pickA, pickB, identical, solvable = index.crossCheck(joint)
+
+        # a change touches its own frame and the next one, whose marker switch
+        # crosses lines on the frame before it
+        dirty = changedFrames(meta, arrays, cached, cachedArrays, joint)
+        dirty[1:] |= dirty[:-1].copy()
+        # continuity offsets carry every change on through the following switches,
+        # so a frame is dirty if anything since the start of its run of switches is
+        switches = solvable & ~identical
+        start = np.maximum.accumulate(np.where(switches, 0, np.arange(len(dirty))))
+        total = np.cumsum(dirty)
+        dirty = total - total[start] + dirty[start] > 0
+        # and solveChain works offsets out once per run of the same markers, so
+        # re-solve those runs whole to land on exactly the same points
+        carries = np.zeros(len(dirty), dtype='bool')
+        carries[1:] = (switches[1:] & solvable[:-1] & (pickA[1:] == pickA[:-1]) &
+                       (pickB[1:] == pickB[:-1]))
+        runs = np.cumsum(~carries)
+        dirty = np.bincount(runs, weights=dirty)[runs] > 0
+
+        masks[joint] = dirty
+        j = cachedJoints.index(joint)
+        kept = np.flatnonzero((cachedArrays['valid'][j] == 1) & ~dirty)
+        points = np.column_stack((cachedArrays['positions'][j, kept],
+                                  cachedArrays['residuals'][j, kept]))
+        previous[joint] = dict(zip((index.frames[kept]).tolist(), map(tuple, points.tolist())))
+
+    checks, markersA, markersB, frames = solveQueue(index, joints, masks=masks)
+    crossed = lineCrossFrames(markersA, markersB, frames, camA, camB, trackA, trackB)
+    resolved = solveChain(checks, crossed, previous)
+
+    # cached frames that stayed clean plus the re-solved ones, in frame order
+    EXPORT = {}
+    for joint in joints:
+        merged = dict(previous[joint])
+        merged.update(resolved[joint])
+        EXPORT[joint] = dict(sorted(merged.items()))
+
+    return EXPORT, meta, arrays, sum(len(check[1]) for check in checks)
+
+def solveTakeIncremental(camPathA, trackPathA, camPathB, trackPathB, exportPath,
+                         residuals=False):
+
+    '''Solves one take reusing the solve cache next to exportPath, then rewrites
+    exportPath and the cache (and with residuals set, the residual column and
+    mocapSolved.residuals.json).  A binary solve next to exportPath is rewritten
+    in its precision along with it, so it never goes stale.
+    Returns the number of re-solved joint frames.'''
+
+    camA, camB, trackA, trackB = loadTake(camPathA, trackPathA, camPathB, trackPathB)
+    cachePath = solveCachePath(exportPath)
+    cache = cacheRead(cachePath) if os.path.exists(exportPath) else None
+
+    EXPORT, meta, arrays, resolved = solveIncremental(camA, camB, trackA, trackB, cache)
+    meta['residuals'] = residuals
+    binary = binaryPath(exportPath)
+    if cache and resolved == 0 and cache[0].get('clips') == meta['clips'] and \
+       cache[0]['joints'] == list(EXPORT) and cache[0].get('residuals') == residuals and \
+       (binaryCurrent(exportPath) or not os.path.exists(binary)):
+        # solve is already up to date
+        return resolved
+
+    temporary = exportPath + ".tmp"
+    with open(temporary, "w") as dataFile:
+        solveWrite(dataFile, EXPORT, meta['clips'], meta['frame_range'], residuals)
+    if os.path.exists(binary):
+        # written after the text solve so it's at least as new as it
+        dtype = binaryRead(open(binary, "rb"))[0]['dtype']
+        with open(binary + ".tmp", "wb") as dataFile:
+            binaryWrite(dataFile, EXPORT, meta['clips'], meta['frame_range'], dtype)
+        os.replace(temporary, exportPath)
+        os.replace(binary + ".tmp", binary)
+    else:
+        os.replace(temporary, exportPath)
+    if residuals:
+        residualWrite(residualPath(exportPath), EXPORT, meta['frame_range'])
+    cacheWrite(cachePath, meta, arrays, EXPORT)
+
+    return resolved
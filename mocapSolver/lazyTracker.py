@@ -0,0 +1,128 @@
+# lazy tracker exports, indexes the marker sections once and parses them on demand
+
+import json
+import mmap
+import os
+from collections.abc import Mapping
+import numpy as np
+
+from .bulkRead import (SECTION, TRACKER_HEADER, _mapFile, _headerRead, _headerCheck, _blockRead,
+                       trackerSections)
+from .trackData import MarkerData, TrackerData
+
+INDEX_VERSION = 1
+
+def trackerIndexPath(trackPath):
+
+    '''cam_TRACKERexport.index.json sidecar path alongside a tracker export path.'''
+
+    if trackPath.endswith(".txt"):
+        trackPath = trackPath[:-4]
+    return trackPath + ".index.json"
+
+def _fileStamp(path):
+
+    '''Size and modification time a sidecar index is only valid for.'''
+
+    status = os.stat(path)
+    return {'size': status.st_size, 'mtime_ns': status.st_mtime_ns}
+
+def indexWrite(indexPath, trackPath, sections):
+
+    '''Writes the trackerSections of a tracker export to a sidecar index.'''
+
+    index = dict(_fileStamp(trackPath), version=INDEX_VERSION,
+                 sections=[[name, start, end] for name, start, end in sections])
+    with open(indexPath, "w") as FILE:
+        json.dump(index, FILE)
+
+def indexRead(indexPath, trackPath):
+
+    '''Reads a sidecar index.  Returns trackerSections list, None if the index is
+    missing, unreadable or older than the tracker export.'''
+
+    try:
+        with open(indexPath) as FILE:
+            index = json.load(FILE)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    if {key: index.get(key) for key in ('size', 'mtime_ns')} != _fileStamp(trackPath):
+        return None
+    return [(name, start, end) for name, start, end in index['sections']]
+
+class LazyMarkers(Mapping):
+
+    '''MarkerData of a mapped tracker export by marker name, each marker's section
+    parsed the first time it's asked for and then kept.  Names and membership
+    come from the section index alone, so probing for markers reads nothing.'''
+
+    def __init__(self, path, sections, dtype='float64', mapped=None):
+        self.path = path
+        self.sections = {name: (start, end) for name, start, end in sections}
+        self.dtype = np.dtype(dtype)
+        self.parsed = {}
+        self.mapped = mapped
+        if self.mapped is None:
+            with open(path, "rb") as FILE:
+                self.mapped = mmap.mmap(FILE.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, name):
+        marker = self.parsed.get(name)
+        if marker is None:
+            start, end = self.sections[name]
+            rows = _blockRead(self.mapped, start, end, 3, self.dtype, self.path)
+            marker = MarkerData.fromRows(name, rows[:, 0].astype('int64'), rows[:, 1:],
+                                         self.dtype)
+            self.parsed[name] = marker
+        return marker
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def __getstate__(self):
+        # worker processes map the export again rather than pickling the map
+        return {'path': self.path, 'sections': self.sections, 'dtype': self.dtype,
+                'parsed': self.parsed}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], [(name, start, end) for name, (start, end)
+                                      in state['sections'].items()], state['dtype'])
+        self.parsed = state['parsed']
+
+    def close(self):
+        self.mapped.close()
+
+def trackerLazyLoad(TRACKER_FILE, dtype='float64', sidecar=False):
+
+    '''Reads a blender tracker data export's header and the byte offsets of its
+    marker sections into TrackerData whose markers are parsed on demand.  With
+    sidecar set the offsets are read from, or first written to, an index file
+    next to the export, so later loads skip scanning the export too.'''
+
+    path = TRACKER_FILE.name
+    mapped = _mapFile(TRACKER_FILE)
+    sections = indexRead(trackerIndexPath(path), path) if sidecar else None
+    if sections is None:
+        sections = trackerSections(mapped)
+        if sidecar:
+            indexWrite(trackerIndexPath(path), path, sections)
+
+    header = _headerRead(mapped, max(mapped.find(SECTION), 0) if sections else len(mapped))
+    try:
+        _headerCheck(header, TRACKER_HEADER, path)
+    except ValueError:
+        mapped.close()
+        raise
+    return TrackerData(clip=header['EXPORT'],
+                       frameRange=(int(header['RANGE'][0]), int(header['RANGE'][2])),
+                       resolution=(int(header['RESOLUTION'][0]), int(header['RESOLUTION'][2])),
+                       trackNum=int(header['NUMBER'][-1]),
+                       markers=LazyMarkers(path, sections, dtype, mapped))
@@ -0,0 +1,158 @@
+# per-joint marker coverage index, picks the markers to cross for whole frame ranges
+
+import numpy as np
+
+from .trackData import TrackerData
+
+def switchChains(identical, solvable, trackedBefore, chainsOnto=False):
+
+    '''Frames a solve can place: frames solved from marker .01 and marker switches
+    whose markers were tracked on the frame before (trackedBefore) when that
+    frame is placed too.  chainsOnto says whether the frame before the range
+    is, e.g. solved by the previous window.  Returns (N,) bool array.'''
+
+    anchor = solvable & identical
+    step = solvable & ~identical & trackedBefore
+    # a switch is placed if its run of chained switches follows a placed frame
+    frames = np.arange(len(step))
+    start = np.maximum.accumulate(np.where(step, -1, frames))
+    follows = np.where(start >= 0, anchor[np.maximum(start, 0)], chainsOnto)
+    return anchor | (step & follows)
+
+def markerCoverage(track, marker, frames):
+
+    '''True on every frame the marker was tracked, False if it never was.'''
+
+    if isinstance(track, TrackerData):
+        if marker not in track.markers:
+            return np.zeros(len(frames), dtype='bool')
+        return track.markers[marker].has(frames)
+    if marker not in track:
+        return np.zeros(len(frames), dtype='bool')
+    return np.fromiter((frame in track[marker] for frame in frames.tolist()),
+                       dtype='bool', count=len(frames))
+
+class JointMarkers:
+
+    '''A joint's 'joint.##' markers in suffix order with per-camera frame coverage,
+    plus each marker's coverage on the frame before the range.'''
+
+    __slots__ = ('joint', 'names', 'suffixes', 'coverA', 'coverB', 'beforeA', 'beforeB')
+
+    def __init__(self, joint, names, suffixes, coverA, coverB, beforeA, beforeB):
+        self.joint = joint
+        self.names = names
+        self.suffixes = suffixes
+        self.coverA = coverA
+        self.coverB = coverB
+        self.beforeA = beforeA
+        self.beforeB = beforeB
+
+class MarkerIndex:
+
+    '''Marker coverage of every joint over a frame range, built once per solve so
+    markerCrossCheck's probing is replaced by array lookups.  An optional
+    SolveProfile counts the marker probes, and the ones of untracked markers
+    (markerCrossCheck's KeyErrors), made building it.'''
+
+    __slots__ = ('frames', 'joints')
+
+    def __init__(self, trackA, trackB, joints, trackRange, profile=None):
+        self.frames = np.arange(int(trackRange[0]), int(trackRange[1]) + 1)
+        self.joints = {}
+        for joint in joints:
+            names = []
+            suffixes = []
+            missing = 0
+            for check in range(1, 100):
+                mark = joint + "." + "{:02d}".format(check)
+                inA = mark in trackA
+                inB = mark in trackB
+                if inA or inB:
+                    names.append(mark)
+                    suffixes.append(check)
+                missing += (not inA) + (not inB)
+            if profile is not None:
+                profile.count('marker_probes', 2 * 99)
+                profile.count('keyerror_probes', missing)
+            # the frame before the range too, marker switches on its first frame cross there
+            frames = np.arange(int(trackRange[0]) - 1, int(trackRange[1]) + 1)
+            coverA = np.zeros((len(names), len(frames)), dtype='bool')
+            coverB = np.zeros((len(names), len(frames)), dtype='bool')
+            for m, mark in enumerate(names):
+                coverA[m] = markerCoverage(trackA, mark, frames)
+                coverB[m] = markerCoverage(trackB, mark, frames)
+            self.joints[joint] = JointMarkers(joint, np.array(names, dtype='object'),
+                                              np.array(suffixes, dtype='int64'),
+                                              coverA[:, 1:], coverB[:, 1:],
+                                              coverA[:, 0], coverB[:, 0])
+
+    def crossCheck(self, joint):
+
+        '''markerCrossCheck for every frame of the range at once.
+        Returns (markersA, markersB, identical, solvable) arrays, one entry per frame.'''
+
+        markers = self.joints[joint]
+        empty = np.full(len(self.frames), None, dtype='object')
+        if not len(markers.names):
+            unsolvable = np.zeros(len(self.frames), dtype='bool')
+            return empty, empty.copy(), unsolvable, unsolvable.copy()
+
+        pickA, pickB, identical, solvable = self._picks(markers)
+        markersA = np.where(solvable, markers.names[pickA], None)
+        markersB = np.where(solvable, markers.names[pickB], None)
+
+        return markersA, markersB, identical, solvable
+
+    def trackedBefore(self, joint):
+
+        '''True on each frame whose picked markers (see crossCheck) were tracked by
+        their cameras on the frame before too, where a marker switch crosses them.'''
+
+        markers = self.joints[joint]
+        if not len(markers.names):
+            return np.zeros(len(self.frames), dtype='bool')
+        pickA, pickB = self._picks(markers)[:2]
+        before = np.empty(len(self.frames), dtype='bool')
+        before[0] = markers.beforeA[pickA[0]] & markers.beforeB[pickB[0]]
+        last = np.arange(len(self.frames) - 1)
+        before[1:] = markers.coverA[pickA[1:], last] & markers.coverB[pickB[1:], last]
+        return before
+
+    @staticmethod
+    def _picks(markers):
+
+        '''Marker indices crossCheck picks of a JointMarkers.
+        Returns (pickA, pickB, identical, solvable) arrays.'''
+
+        # first marker tracked by both cameras
+        both = markers.coverA & markers.coverB
+        anyBoth = both.any(axis=0)
+        firstBoth = both.argmax(axis=0)
+
+        # otherwise the first marker tracked by each camera
+        anyA = markers.coverA.any(axis=0)
+        anyB = markers.coverB.any(axis=0)
+        pickA = np.where(anyBoth, firstBoth, markers.coverA.argmax(axis=0))
+        pickB = np.where(anyBoth, firstBoth, markers.coverB.argmax(axis=0))
+
+        solvable = anyBoth | (anyA & anyB)
+        identical = anyBoth & (markers.suffixes[firstBoth] == 1)
+
+        return pickA, pickB, identical, solvable
+
+    def crossCheckFrame(self, joint, frame):
+
+        '''Same result as markerCrossCheck(joint, frame, trackA, trackB).'''
+
+        markers = self.joints[joint]
+        f = frame - int(self.frames[0])
+        both = np.flatnonzero(markers.coverA[:, f] & markers.coverB[:, f])
+        if len(both):
+            mark = markers.names[both[0]]
+            return (mark, mark, bool(markers.suffixes[both[0]] == 1))
+        inA = np.flatnonzero(markers.coverA[:, f])
+        inB = np.flatnonzero(markers.coverB[:, f])
+        if len(inA) and len(inB):
+            return (markers.names[inA[0]], markers.names[inB[0]], False)
+        return None
@@ -0,0 +1,213 @@
+# solves 3d motion capture points from any number of cameras in one batched pass
+
+import logging
+import numpy as np
+
+from .dataRead import jointList
+from .markerIndex import markerCoverage
+from .vectorTriangulate import cameraArrays, cameraMatrices, trackArrays, rayDirections
+from .cameraModel import cameraLens
+
+log = logging.getLogger(__name__)
+
+def solveRangeMulti(cams, tracks):
+
+    '''Finds the frame range covered by every camera and every tracker.
+    Returns tuple of (first frame, last frame).'''
+
+    first = max(int(data['frame_range'][0]) for data in list(cams) + list(tracks))
+    last = min(int(data['frame_range'][1]) for data in list(cams) + list(tracks))
+
+    if last < first:
+        raise Exception("No overlapping frames for solve!")
+
+    return (first, last)
+
+def closestPointToRays(origins, directions, mask):
+
+    '''Least-squares closest point to several rays per row.  origins and directions
+    are (N, C, 3) with unit directions, mask (N, C) picks the rays of each row.
+    The residual is twice the RMS distance from the point to its rays, which for
+    2 rays is the distance between them, the residual lineCross reports.
+    Returns (N, 4) array of (x, y, z, residual), NaN where fewer than 2 rays.'''
+
+    weights = mask.astype('float64')[..., None, None]
+
+    # sum of (I - d d^T) over the rays of each row, and the same applied to the origins
+    projection = np.eye(3) - directions[..., :, None] * directions[..., None, :]
+    A = (weights * projection).sum(axis=1)
+    b = (weights * (projection @ origins[..., None])).sum(axis=1)[..., 0]
+
+    solvable = (mask.sum(axis=1) >= 2) & (np.abs(np.linalg.det(A)) > 1e-12)
+    points = np.full((len(A), 3), np.nan)
+    points[solvable] = np.linalg.solve(A[solvable], b[solvable][..., None])[..., 0]
+
+    # distance of the point from each ray
+    offset = points[:, None, :] - origins
+    along = np.einsum('ncj,ncj->nc', offset, directions)[..., None] * directions
+    distance = np.linalg.norm(offset - along, axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        residual = 2 * np.sqrt((distance ** 2 * mask).sum(axis=1) / mask.sum(axis=1))
+
+    return np.column_stack((points, residual))
+
+def multiRays(cams, tracks, markers, frames, mask, model='angles'):
+
+    '''Ray origins and directions of each camera for parallel marker and frame
+    sequences, filled only where mask (N, C) is set, under a camera model.
+    markers is (N,) with one marker per row or (N, C) with one per camera.
+    Returns 2 (N, C, 3) arrays.'''
+
+    markers = np.asarray(markers, dtype='object')
+    frames = np.asarray(frames)
+    if markers.ndim == 1:
+        markers = np.repeat(markers[:, None], len(cams), axis=1)
+    origins = np.zeros((len(frames), len(cams), 3))
+    directions = np.zeros((len(frames), len(cams), 3))
+
+    for c, (cam, track) in enumerate(zip(cams, tracks)):
+        rows = np.flatnonzero(mask[:, c])
+        if not len(rows):
+            continue
+        origin, rotation = cameraArrays(cam, frames[rows].tolist())
+        positions = trackArrays(track, markers[rows, c].tolist(), frames[rows].tolist())
+        origins[rows, c] = origin
+        directions[rows, c] = rayDirections(rotation, cameraLens(cam, model), positions,
+                                            cameraMatrices(cam, frames[rows]))
+
+    return origins, directions
+
+def multiCrossCheck(cams, tracks, joint, frames):
+
+    '''Picks the first 'joint.##' marker seen by at least 2 cameras on each frame,
+    or failing that each camera's first seen marker if at least 2 cameras see
+    one, like markerCrossCheck.  Returns (markers, identical, solvable, cover,
+    lastCover): markers (N, C) holds each camera's marker, None where it sees
+    none, cover (N, C) marks the cameras that see their marker and lastCover
+    the ones that saw it on the frame before too.'''
+
+    names = []
+    suffixes = []
+    for check in range(1, 100):
+        mark = joint + "." + "{:02d}".format(check)
+        if any(mark in track for track in tracks):
+            names.append(mark)
+            suffixes.append(check)
+
+    if not names:
+        unsolvable = np.zeros(len(frames), dtype='bool')
+        uncovered = np.zeros((len(frames), len(cams)), dtype='bool')
+        return (np.full((len(frames), len(cams)), None, dtype='object'), unsolvable,
+                unsolvable.copy(), uncovered, uncovered.copy())
+
+    # (C, K, N) coverage of every marker by every camera
+    coverage = np.stack([np.stack([markerCoverage(track, mark, frames) for mark in names])
+                         for track in tracks])
+    seen = coverage.sum(axis=0) >= 2
+    same = seen.any(axis=0)
+
+    # otherwise the first marker of each camera that sees any
+    picks = np.where(same[:, None], seen.argmax(axis=0)[:, None], coverage.argmax(axis=1).T)
+    columns = np.arange(len(cams))[None, :]
+    rows = np.arange(len(frames))[:, None]
+    cover = coverage[columns, picks, rows]
+    lastCover = np.zeros_like(cover)
+    lastCover[1:] = cover[1:] & coverage[columns, picks, rows - 1][1:]
+
+    solvable = same | (cover.sum(axis=1) >= 2)
+    identical = same & (np.array(suffixes)[picks[:, 0]] == 1)
+    cover &= solvable[:, None]
+    markers = np.where(cover, np.array(names, dtype='object')[picks], None)
+
+    return markers, identical, solvable, cover, lastCover
+
+def _frameSpans(frames):
+
+    '''"20-25, 40" style summary of sorted frame numbers.'''
+
+    spans = []
+    for frame in frames:
+        if spans and frame == spans[-1][1] + 1:
+            spans[-1][1] = frame
+        else:
+            spans.append([frame, frame])
+    return ", ".join(str(first) if first == last else "{}-{}".format(first, last)
+                     for first, last in spans)
+
+def solveMulti(cams, tracks, joints=None, model='angles', dropped=None):
+
+    '''Calculates the point closest to every camera's ray for every joint on every
+    solvable frame.  cams and tracks are parallel sequences of camera and tracker
+    exports.  Marker switches chain onto the previous frame like solve(), using
+    the cameras that see their markers on both frames.  Switches with no solved
+    frame before them or fewer than 2 such cameras can't be chained, they're
+    left out, logged, and listed per joint in the optional dropped dictionary.
+    model is the camera model.
+    Returns nested dictionary of {joint: {frame: (x, y, z, ...)}}.'''
+
+    if len(cams) != len(tracks):
+        raise ValueError("Every camera export needs a tracker export")
+
+    trackRange = solveRangeMulti(cams, tracks)
+    frames = np.arange(trackRange[0], trackRange[1] + 1)
+    if joints is None:
+        joints = jointList(*tracks)
+
+    # queue every solvable joint frame, then the previous frame of marker switches
+    checks = []
+    queueMarkers = []
+    queueFrames = []
+    queueMasks = []
+    for joint in joints:
+        markers, identical, solvable, cover, lastCover = multiCrossCheck(cams, tracks, joint,
+                                                                         frames)
+
+        # marker switches keep the cameras that saw their marker on the last frame too
+        switch = solvable & ~identical & (lastCover.sum(axis=1) >= 2)
+        mask = np.where(switch[:, None], lastCover, cover)
+        solved = np.flatnonzero(identical | switch)
+        switched = np.flatnonzero(switch)
+
+        checks.append((joint, frames[solved], identical[solved], len(queueFrames),
+                       frames[solvable & ~identical & ~switch]))
+        queueMarkers.append(markers[solved])
+        queueMarkers.append(markers[switched])
+        queueFrames.extend(frames[solved].tolist() + (frames[switched] - 1).tolist())
+        queueMasks.extend([mask[solved], mask[switched]])
+
+    queueMask = np.concatenate(queueMasks) if queueMasks else np.zeros((0, len(cams)), 'bool')
+    queueMarkers = (np.concatenate(queueMarkers) if queueMarkers else
+                    np.zeros((0, len(cams)), dtype='object'))
+
+    # one least-squares pass over every queued joint frame
+    origins, directions = multiRays(cams, tracks, queueMarkers, queueFrames, queueMask, model)
+    crossed = closestPointToRays(origins, directions, queueMask)
+
+    # chain marker switches onto the previous frame, dropping those after a gap
+    EXPORT = {}
+    for joint, solvedFrames, identical, start, unchained in checks:
+        EXPORT[joint] = {}
+        thisFrames = crossed[start:start + len(solvedFrames)]
+        lastFrames = crossed[start + len(solvedFrames):]
+        lost = unchained.tolist()
+        s = 0
+        for c, w in enumerate(solvedFrames.tolist()):
+            if identical[c]:
+                EXPORT[joint][w] = thisFrames[c].tolist()
+            else:
+                if w-1 in EXPORT[joint]:
+                    EXPORT[joint][w] = tuple((thisFrames[c, :3] - lastFrames[s, :3]
+                                              + EXPORT[joint][w-1][:3]).tolist()) + \
+                                       (float(thisFrames[c, 3]),)
+                else:
+                    lost.append(w)
+                s += 1
+
+        if lost:
+            lost.sort()
+            log.warning("%s: dropped %d marker switch frames with nothing to chain onto (%s)",
+                        joint, len(lost), _frameSpans(lost))
+            if dropped is not None:
+                dropped[joint] = lost
+
+    return EXPORT
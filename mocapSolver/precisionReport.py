@@ -0,0 +1,162 @@
+# precision report, how far a float32 solve of a take lands from its float64 solve
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from .bulkRead import cameraBulkLoad, trackerBulkLoad
+from .multiCamera import solveMulti
+from .solver import solve
+from .trackData import PRECISIONS
+
+def takeBytes(cams, tracks):
+
+    '''Bytes of the parsed arrays of a take's camera and tracker data.'''
+
+    size = 0
+    for cam in cams:
+        size += cam.data.nbytes + (cam.matrices.nbytes if cam.matrices is not None else 0)
+    for track in tracks:
+        for marker in track.markers.values():
+            size += marker.frames.nbytes + marker.co.nbytes + marker.valid.nbytes
+    return size
+
+def solveDifference(EXPORT, reference, decimals=6):
+
+    '''Distance of every point of a solve from the same joint frame of a reference
+    solve, plus the frames only one of them solved and the points whose
+    exported (rounded to decimals) coordinates differ.
+    Returns {joint: statistics} plus an 'all' entry.'''
+
+    difference = {}
+    distances = []
+    residuals = []
+    totals = {'missing': 0, 'extra': 0, 'export_changes': 0}
+    for joint in reference:
+        solved = EXPORT.get(joint, {})
+        frames = [frame for frame in reference[joint] if frame in solved]
+        statistics = {'frames': len(frames),
+                      'missing': len(reference[joint]) - len(frames),
+                      'extra': len(solved) - len(frames)}
+        if frames:
+            # points without a residual (solveScalar's chained ones) compare positions only
+            points = np.array([tuple(solved[frame][:4]) + (np.nan,) * (4 - len(solved[frame]))
+                               for frame in frames], dtype='float64')
+            expected = np.array([tuple(reference[joint][frame][:4]) +
+                                 (np.nan,) * (4 - len(reference[joint][frame]))
+                                 for frame in frames], dtype='float64')
+            distance = np.linalg.norm(points[:, :3] - expected[:, :3], axis=1)
+            residual = np.abs(points[:, 3] - expected[:, 3])
+            distances.append(distance)
+            residuals.append(residual)
+            statistics['rms'] = float(np.sqrt(np.mean(distance ** 2)))
+            statistics['max'] = float(distance.max())
+            statistics['residual_max'] = (float(np.nanmax(residual)) if
+                                          np.isfinite(residual).any() else 0.0)
+            statistics['export_changes'] = int(np.any(np.round(points[:, :3], decimals) !=
+                                                      np.round(expected[:, :3], decimals),
+                                                      axis=1).sum())
+            totals['export_changes'] += statistics['export_changes']
+        totals['missing'] += statistics['missing']
+        totals['extra'] += statistics['extra']
+        difference[joint] = statistics
+
+    distance = np.concatenate(distances) if distances else np.zeros(0)
+    residual = np.concatenate(residuals) if residuals else np.zeros(0)
+    difference['all'] = dict(totals, frames=int(len(distance)),
+                             rms=float(np.sqrt(np.mean(distance ** 2))) if len(distance) else None,
+                             max=float(distance.max()) if len(distance) else None,
+                             residual_max=float(np.nanmax(residual)) if np.isfinite(residual).any()
+                             else None)
+    return difference
+
+def _solvePrecision(camPaths, trackPaths, dtype, memory):
+
+    '''Loads and solves a take in dtype.  Returns (EXPORT, results).'''
+
+    if memory:
+        tracemalloc.start()
+    try:
+        begin = time.perf_counter()
+        cams = [cameraBulkLoad(open(camPath, "rb"), dtype=dtype) for camPath in camPaths]
+        tracks = [trackerBulkLoad(open(trackPath, "rb"), dtype=dtype) for trackPath in trackPaths]
+        if len(cams) > 2:
+            EXPORT = solveMulti(cams, tracks)
+        else:
+            EXPORT = solve(cams[0], cams[1], tracks[0], tracks[1])
+        results = {'seconds': time.perf_counter() - begin,
+                   'data_mb': takeBytes(cams, tracks) / 1e6}
+        if memory:
+            results['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return EXPORT, results
+
+def precisionCompare(camPaths, trackPaths, dtype='float32', memory=True):
+
+    '''Solves a take in float64 and in dtype and compares them, point distances
+    and exported coordinate changes as well as time, parsed array size and
+    (with memory set) traced peak memory of each.
+    Returns dictionary of results.'''
+
+    reference, results64 = _solvePrecision(camPaths, trackPaths, 'float64', memory)
+    EXPORT, results = _solvePrecision(camPaths, trackPaths, dtype, memory)
+    return {'dtype': dtype, 'cameras': len(camPaths), 'float64': results64, dtype: results,
+            'difference': solveDifference(EXPORT, reference)}
+
+def report(results, FILE=sys.stdout):
+
+    '''Prints a precision comparison as a table.'''
+
+    dtype = results['dtype']
+    for precision in ('float64', dtype):
+        line = "{:<8}{:>9.3f} s{:>10.1f} MB data".format(
+            precision, results[precision]['seconds'], results[precision]['data_mb'])
+        if 'peak_mb' in results[precision]:
+            line += "{:>10.1f} MB peak".format(results[precision]['peak_mb'])
+        FILE.write(line + "\n")
+    difference = results['difference']['all']
+    FILE.write("{} joint frames compared, {} missing, {} extra\n".format(
+        difference['frames'], difference['missing'], difference['extra']))
+    FILE.write("distance rms {:.2e}, max {:.2e}, residual max {:.2e}\n".format(
+        difference['rms'] or 0, difference['max'] or 0, difference['residual_max'] or 0))
+    FILE.write("{} points ({:.2%}) change in the 6 decimal export\n".format(
+        difference['export_changes'], difference['export_changes'] / max(difference['frames'], 1)))
+
+def main(argv=None):
+
+    '''Compares a take's float32 solve against its float64 solve.'''
+
+    parser = argparse.ArgumentParser(prog="mocapSolver.precisionReport",
+                                     description="Solves a take in float64 and in a lower "
+                                                 "precision and reports how far apart they "
+                                                 "are.")
+    parser.add_argument("exports", nargs="+",
+                        help="camera 1 CAMERA DATA, camera 1 TRACKER DATA, camera 2 CAMERA "
+                             "DATA, camera 2 TRACKER DATA, ...")
+    parser.add_argument("-p", "--precision", choices=PRECISIONS[1:], default='float32',
+                        help="precision compared with float64, the exported points usually "
+                             "move by around 1e-5 and most change in the 6th decimal "
+                             "(default: float32)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip tracing peak memory")
+    parser.add_argument("--json", help="also write the results, per joint, to this JSON file")
+    args = parser.parse_args(argv)
+
+    if len(args.exports) < 4 or len(args.exports) % 2:
+        parser.error("give a camera and a tracker export per camera, at least 2 cameras")
+
+    results = precisionCompare(args.exports[0::2], args.exports[1::2], args.precision,
+                               args.memory)
+    report(results)
+    if args.json:
+        with open(args.json, "w") as FILE:
+            json.dump(results, FILE, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
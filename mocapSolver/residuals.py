@@ -0,0 +1,84 @@
+# triangulation residuals, per joint frame error of a solve and its summary statistics
+
+import json
+import numpy as np
+
+RESIDUAL_PERCENTILES = (50, 90, 95, 99)
+
+def residualArrays(EXPORT, trackRange):
+
+    '''Dense residuals of a solve over its frame range, the distance between the
+    crossed lines, or with more cameras twice the RMS distance from the point to
+    each ray, which is the same for 2, kept as every solved point's 4th value.
+    Returns (joints, (J, F) residuals) with NaN on unsolved frames.'''
+
+    joints = list(EXPORT)
+    first = int(trackRange[0])
+    count = int(trackRange[1]) - first + 1
+    residuals = np.full((len(joints), count), np.nan)
+
+    for j, joint in enumerate(joints):
+        if EXPORT[joint]:
+            frames = np.fromiter(EXPORT[joint], dtype='int64', count=len(EXPORT[joint]))
+            residuals[j, frames - first] = [point[3] if len(point) > 3 else np.nan
+                                            for point in EXPORT[joint].values()]
+
+    return joints, residuals
+
+def _statistics(values, percentiles):
+
+    '''Summary of one set of residuals, NaN for unsolved frames.'''
+
+    values = values[~np.isnan(values)]
+    summary = {'frames': int(len(values))}
+    if len(values):
+        summary['mean'] = float(values.mean())
+        summary['max'] = float(values.max())
+        for percentile, value in zip(percentiles, np.percentile(values, percentiles).tolist()):
+            summary['p{}'.format(percentile)] = value
+    return summary
+
+def _worst(residuals, worst):
+
+    '''Flat indices of the largest residuals, largest first, skipping NaN.'''
+
+    flat = np.where(np.isnan(residuals), -np.inf, residuals).ravel()
+    order = np.argsort(flat)[::-1][:worst]
+    return order[np.isfinite(flat[order])]
+
+def residualSummary(joints, residuals, trackRange, worst=5, percentiles=RESIDUAL_PERCENTILES):
+
+    '''Per joint and take wide residual statistics: solved frame count, mean, max,
+    percentiles and the worst frames, as [frame, residual] per joint and
+    [joint, frame, residual] take wide.
+    Returns {'frame_range', 'all', 'joints': {joint: statistics}}.'''
+
+    first = int(trackRange[0])
+    summary = {'frame_range': [first, int(trackRange[1])],
+               'all': _statistics(residuals.ravel(), percentiles),
+               'joints': {}}
+    summary['all']['worst'] = [[joints[i // residuals.shape[1]],
+                                int(i % residuals.shape[1]) + first,
+                                float(residuals.flat[i])] for i in _worst(residuals, worst)]
+    for j, joint in enumerate(joints):
+        summary['joints'][joint] = _statistics(residuals[j], percentiles)
+        summary['joints'][joint]['worst'] = [[int(f) + first, float(residuals[j, f])]
+                                             for f in _worst(residuals[j], worst)]
+    return summary
+
+def residualPath(exportPath):
+
+    '''mocapSolved.residuals.json path alongside a mocapSolved.txt path.'''
+
+    if exportPath.endswith(".txt"):
+        exportPath = exportPath[:-4]
+    return exportPath + ".residuals.json"
+
+def residualWrite(path, EXPORT, trackRange, worst=5):
+
+    '''Writes the residual summary of a solve to a JSON file.'''
+
+    summary = residualSummary(*residualArrays(EXPORT, trackRange), trackRange, worst)
+    with open(path, "w") as FILE:
+        json.dump(summary, FILE, indent=2)
+    return summary
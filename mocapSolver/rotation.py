@@ -0,0 +1,93 @@
+# euler rotations matching mathutils.Euler (XYZ order) without importing it, in numpy for
+# arrays of eulers and in plain math for the per sample solver
+
+import math
+import numpy as np
+
+from .vectorTriangulate import axisMatrices, eulerMatrices
+
+# mathutils stores single precision, below this cos(y) an euler is in gimbal lock
+GIMBAL_EPSILON = 16 * np.finfo('float32').eps
+
+def matrixEulers(matrices):
+
+    '''XYZ euler angles of (N, 3, 3) rotation matrices, picking the same one of the
+    2 equivalent solutions as mathutils (the smaller sum of absolute angles).
+    Returns (N, 3) array.'''
+
+    matrices = np.asarray(matrices, dtype='float64')
+    cy = np.hypot(matrices[..., 0, 0], matrices[..., 1, 0])
+    first = np.stack((np.arctan2(matrices[..., 2, 1], matrices[..., 2, 2]),
+                      np.arctan2(-matrices[..., 2, 0], cy),
+                      np.arctan2(matrices[..., 1, 0], matrices[..., 0, 0])), axis=-1)
+    second = np.stack((np.arctan2(-matrices[..., 2, 1], -matrices[..., 2, 2]),
+                       np.arctan2(-matrices[..., 2, 0], -cy),
+                       np.arctan2(-matrices[..., 1, 0], -matrices[..., 0, 0])), axis=-1)
+    eulers = np.where((np.abs(first).sum(axis=-1) > np.abs(second).sum(axis=-1))[..., None],
+                      second, first)
+
+    # gimbal lock, z is folded into x
+    locked = cy <= GIMBAL_EPSILON
+    if np.any(locked):
+        eulers[locked] = np.stack((np.arctan2(-matrices[locked, 1, 2], matrices[locked, 1, 1]),
+                                   np.arctan2(-matrices[locked, 2, 0], cy[locked]),
+                                   np.zeros(np.count_nonzero(locked))), axis=-1)
+    return eulers
+
+def eulerRotateAxis(eulers, axis, angles):
+
+    '''mathutils.Euler.rotate_axis for (N, 3) XYZ eulers: turns each about its own
+    local axis ('X', 'Y' or 'Z') by angles and converts back to eulers.
+    Returns (N, 3) array.'''
+
+    eulers = np.asarray(eulers, dtype='float64').reshape(-1, 3)
+    angles = np.broadcast_to(np.asarray(angles, dtype='float64'), eulers.shape[:1])
+    return matrixEulers(eulerMatrices(eulers) @ axisMatrices(axis, angles))
+
+def _eulerMatrix(euler):
+
+    '''XYZ euler rotation matrix (Rz * Ry * Rx) as nested tuples.'''
+
+    cx, sx = math.cos(euler[0]), math.sin(euler[0])
+    cy, sy = math.cos(euler[1]), math.sin(euler[1])
+    cz, sz = math.cos(euler[2]), math.sin(euler[2])
+    return ((cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx),
+            (sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx),
+            (-sy, cy * sx, cy * cx))
+
+def eulerRotate(euler, axis, angle):
+
+    '''eulerRotateAxis for a single (x, y, z) euler and angle in plain math, a
+    numpy call per tracked point costs far more than the rotation itself.
+    Returns tuple.'''
+
+    (a, b, c), (d, e, f), (g, h, i) = _eulerMatrix(euler)
+    cos, sin = math.cos(angle), math.sin(angle)
+    # the euler's matrix times the rotation about its own local axis
+    if axis == 'X':
+        matrix = ((a, b * cos + c * sin, c * cos - b * sin),
+                  (d, e * cos + f * sin, f * cos - e * sin),
+                  (g, h * cos + i * sin, i * cos - h * sin))
+    elif axis == 'Y':
+        matrix = ((a * cos - c * sin, b, a * sin + c * cos),
+                  (d * cos - f * sin, e, d * sin + f * cos),
+                  (g * cos - i * sin, h, g * sin + i * cos))
+    elif axis == 'Z':
+        matrix = ((a * cos + b * sin, b * cos - a * sin, c),
+                  (d * cos + e * sin, e * cos - d * sin, f),
+                  (g * cos + h * sin, h * cos - g * sin, i))
+    else:
+        raise ValueError("axis must be 'X', 'Y' or 'Z', not {!r}".format(axis))
+
+    cy = math.hypot(matrix[0][0], matrix[1][0])
+    if cy <= GIMBAL_EPSILON:
+        # gimbal lock, z is folded into x
+        return (math.atan2(-matrix[1][2], matrix[1][1]), math.atan2(-matrix[2][0], cy), 0.0)
+    first = (math.atan2(matrix[2][1], matrix[2][2]), math.atan2(-matrix[2][0], cy),
+             math.atan2(matrix[1][0], matrix[0][0]))
+    second = (math.atan2(-matrix[2][1], -matrix[2][2]), math.atan2(-matrix[2][0], -cy),
+              math.atan2(-matrix[1][0], -matrix[0][0]))
+    if abs(first[0]) + abs(first[1]) + abs(first[2]) > \
+            abs(second[0]) + abs(second[1]) + abs(second[2]):
+        return second
+    return first
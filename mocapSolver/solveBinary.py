@@ -0,0 +1,120 @@
+# binary solve container, full precision and loadable without parsing
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+BINARY_MAGIC = b"MOCAPSLV"
+BINARY_VERSION = 1
+BINARY_ALIGN = 64
+
+def binaryPath(exportPath):
+
+    '''mocapSolved.mcs path alongside a mocapSolved.txt path.'''
+
+    if exportPath.endswith(".txt"):
+        exportPath = exportPath[:-4]
+    return exportPath + ".mcs"
+
+def binaryCurrent(exportPath):
+
+    '''True if a binary solve sits next to exportPath and is at least as new as
+    it, so it holds the same solve.  An older binary solve is left over from an
+    earlier run and only the text solve is current.'''
+
+    path = binaryPath(exportPath)
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(exportPath) or os.path.getmtime(path) >= os.path.getmtime(exportPath)
+
+def binaryDiscard(exportPath):
+
+    '''Removes the binary solve of an earlier run next to exportPath, which a solve
+    writing only text would otherwise leave stale.  Returns True if one was.'''
+
+    try:
+        os.remove(binaryPath(exportPath))
+    except FileNotFoundError:
+        return False
+    return True
+
+def solveArrays(EXPORT, trackRange, dtype='float64'):
+
+    '''Dense arrays of a solve over its frame range.
+    Returns (joints, (J, F, 3) positions, (J, F) validity).'''
+
+    joints = list(EXPORT)
+    first = int(trackRange[0])
+    count = int(trackRange[1]) - first + 1
+    positions = np.zeros((len(joints), count, 3), dtype=dtype)
+    valid = np.zeros((len(joints), count), dtype='uint8')
+
+    for j, joint in enumerate(joints):
+        if EXPORT[joint]:
+            frames = np.fromiter(EXPORT[joint], dtype='int64', count=len(EXPORT[joint]))
+            points = np.array([point[:3] for point in EXPORT[joint].values()], dtype='float64')
+            positions[j, frames - first] = points
+            valid[j, frames - first] = 1
+
+    return joints, positions, valid
+
+def binaryWrite(dataFile, EXPORT, clips, trackRange, dtype='float64'):
+
+    '''Writes a solve to an open binary file: magic, JSON header, then (J, F, 3)
+    positions and (J, F) validity flags as contiguous arrays.'''
+
+    joints, positions, valid = solveArrays(EXPORT, trackRange, dtype)
+    header = json.dumps({'version': BINARY_VERSION, 'clips': list(clips),
+                         'frame_range': [int(trackRange[0]), int(trackRange[1])],
+                         'joints': joints, 'dtype': np.dtype(dtype).str}).encode()
+
+    # pad the header so the arrays start aligned
+    size = len(BINARY_MAGIC) + 4 + len(header)
+    header += b" " * (-size % BINARY_ALIGN)
+
+    dataFile.write(BINARY_MAGIC)
+    dataFile.write(struct.pack("<I", len(header)))
+    dataFile.write(header)
+    dataFile.write(positions.tobytes())
+    dataFile.write(valid.tobytes())
+
+def binaryRead(SOLVE_FILE):
+
+    '''Maps a binary solve without copying.  Returns (header, (J, F, 3) positions,
+    (J, F) validity) with the arrays backed by the mapped file.'''
+
+    try:
+        mapped = mmap.mmap(SOLVE_FILE.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        SOLVE_FILE.close()
+
+    if mapped[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError("Not a mocapMath binary solve")
+    length = struct.unpack_from("<I", mapped, len(BINARY_MAGIC))[0]
+    start = len(BINARY_MAGIC) + 4
+    header = json.loads(mapped[start:start + length].decode())
+
+    joints = len(header['joints'])
+    frames = header['frame_range'][1] - header['frame_range'][0] + 1
+    offset = start + length
+    positions = np.frombuffer(mapped, dtype=np.dtype(header['dtype']), count=joints * frames * 3,
+                              offset=offset).reshape(joints, frames, 3)
+    offset += positions.nbytes
+    valid = np.frombuffer(mapped, dtype='uint8', count=joints * frames,
+                          offset=offset).reshape(joints, frames)
+
+    return header, positions, valid.view('bool')
+
+def binaryToExport(header, positions, valid):
+
+    '''Nested {joint: {frame: (x, y, z)}} dictionary of a binary solve.'''
+
+    first = header['frame_range'][0]
+    EXPORT = {}
+    for j, joint in enumerate(header['joints']):
+        frames = np.flatnonzero(valid[j])
+        EXPORT[joint] = dict(zip((frames + first).tolist(),
+                                 map(tuple, positions[j, frames].tolist())))
+    return EXPORT
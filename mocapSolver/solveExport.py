@@ -0,0 +1,34 @@
+# writes solved coordinate data for import into supported applications
+
+KEYFRAME_FORMAT = "{:05d} {:8f} {:8f} {:8f}\n"
+RESIDUAL_FORMAT = "{:05d} {:8f} {:8f} {:8f} {:8f}\n"
+
+def solveHeader(dataFile, clips, trackRange):
+
+    '''Writes the mocapSolved.txt header to an open text file.'''
+
+    dataFile.write("SOLVED DATA EXPORT for {} \n\n".format(" and ".join(clips)))
+    dataFile.write("RANGE {} to {}\n\n".format(trackRange[0], trackRange[1]))
+
+def solveRows(keyframes, residuals=False):
+
+    '''Formats {frame: (x, y, z, ...)} as mocapSolved.txt keyframe rows, with each
+    point's residual as an extra column if residuals is set.'''
+
+    if residuals:
+        return [RESIDUAL_FORMAT.format(keyframe, point[0], point[1], point[2],
+                                       point[3] if len(point) > 3 else float('nan'))
+                for keyframe, point in keyframes.items()]
+    return [KEYFRAME_FORMAT.format(keyframe, point[0], point[1], point[2])
+            for keyframe, point in keyframes.items()]
+
+def solveWrite(dataFile, EXPORT, clips, trackRange, residuals=False):
+
+    '''Writes a solve to an open text file in the mocapSolved.txt format,
+    optionally with a residual column.'''
+
+    solveHeader(dataFile, clips, trackRange)
+    # loop through nested dictionaries for file export
+    for solve in EXPORT:
+        dataFile.write("\n##### {}\n".format(solve))
+        dataFile.writelines(solveRows(EXPORT[solve], residuals))
@@ -0,0 +1,94 @@
+# opt-in solve instrumentation, stage and joint timings and counters written as JSON
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+class SolveProfile:
+
+    '''Timings and counters of a solve, filled in by the solver stages it's passed to.
+    stages holds {stage: {'calls', 'seconds'}}, joints holds {joint: {counter: value}}
+    and counters holds take wide counts.'''
+
+    __slots__ = ('stages', 'joints', 'counters')
+
+    def __init__(self):
+        self.stages = {}
+        self.joints = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+
+        '''Times the body of a with block as one call of a stage.'''
+
+        begin = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, time.perf_counter() - begin)
+
+    def add(self, name, seconds, calls=1):
+
+        '''Adds time spent in a stage.'''
+
+        stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        stage['calls'] += calls
+        stage['seconds'] += seconds
+
+    def joint(self, joint, **counts):
+
+        '''Adds to a joint's counters and timings.'''
+
+        counters = self.joints.setdefault(joint, {})
+        for key, value in counts.items():
+            counters[key] = counters.get(key, 0) + value
+
+    def count(self, name, n=1):
+
+        '''Adds to a take wide counter.'''
+
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+
+        '''Adds the stages, joints and counters of another profile (or its toDict),
+        e.g. one filled in by a worker process.'''
+
+        if isinstance(other, SolveProfile):
+            other = other.toDict()
+        for name, stage in other['stages'].items():
+            self.add(name, stage['seconds'], stage['calls'])
+        for joint, counts in other['joints'].items():
+            self.joint(joint, **counts)
+        for name, n in other['counters'].items():
+            self.count(name, n)
+
+    def toDict(self):
+
+        '''Plain dictionary of everything recorded, ready for json.'''
+
+        return {'stages': self.stages, 'counters': self.counters, 'joints': self.joints}
+
+    def write(self, path):
+
+        '''Writes the profile to a JSON file.'''
+
+        with open(path, "w") as FILE:
+            json.dump(self.toDict(), FILE, indent=2)
+
+def profiled(profile, name):
+
+    '''profile.stage(name), or a do nothing context if profiling is off.'''
+
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
+
+def profilePath(exportPath):
+
+    '''mocapSolved.profile.json path alongside a mocapSolved.txt path.'''
+
+    if exportPath.endswith(".txt"):
+        exportPath = exportPath[:-4]
+    return exportPath + ".profile.json"
@@ -0,0 +1,480 @@
+# solves 3d motion capture points from two cameras' worth of exported data
+
+import logging
+import os
+import time
+import numpy as np
+
+from .dataRead import jointList
+from .bulkRead import cameraBulkLoad, trackerBulkLoad
+from .lazyTracker import trackerLazyLoad
+from .markerIndex import MarkerIndex, switchChains
+from .crossCache import CrossCache
+from .multiCamera import solveRangeMulti, solveMulti, _frameSpans
+from .triangulate import lineCross
+from .vectorTriangulate import cameraMatrices, lineCrossFrames
+from .solveExport import solveWrite
+from .solveBinary import binaryPath, binaryDiscard, binaryWrite
+from .solveProfile import SolveProfile, profiled, profilePath
+from .residuals import residualPath, residualWrite
+
+log = logging.getLogger(__name__)
+
+def solveRange(camA, camB, trackA, trackB):
+
+    '''Finds the frame range covered by both cameras and both trackers.
+    Returns tuple of (first frame, last frame).'''
+
+    # confirm range is solvable
+    MIN_CAM = max(int(camA['frame_range'][0]), int(camB['frame_range'][0]))
+    MAX_CAM = min(int(camA['frame_range'][1]), int(camB['frame_range'][1]))
+    MIN_TRACK = max(int(trackA['frame_range'][0]), int(trackB['frame_range'][0]))
+    MAX_TRACK = min(int(trackA['frame_range'][1]), int(trackB['frame_range'][1]))
+
+    trackRange = (max(MIN_CAM, MIN_TRACK), min(MAX_CAM, MAX_TRACK))
+
+    if trackRange[1] < trackRange[0]:
+        raise Exception("No overlapping frames for solve!")
+
+    return trackRange
+
+def markerCrossCheck(joint, frame, trackA, trackB, profile=None):
+
+    '''Check for identical joint markers or identify the closest pair.
+    An optional SolveProfile counts the marker probes and their KeyErrors.'''
+
+    for check in range(1, 100):
+        iteration = "{:02d}".format(check)
+        mark = joint + "." + iteration
+        if profile is not None:
+            profile.count('marker_probes')
+        try:
+            if frame in trackA[mark] and frame in trackB[mark]:
+                if check == 1:
+                    return (mark, mark, True)
+                else:
+                    return (mark, mark, False)
+        except KeyError:
+            if profile is not None:
+                profile.count('keyerror_probes')
+    for doubleCheck in range(1, 100):
+        doubleIteration = "{:02d}".format(doubleCheck)
+        doubleMark = joint + "." + doubleIteration
+        for tripleCheck in range(1, 100):
+            tripleIteration = "{:02d}".format(tripleCheck)
+            tripleMark = joint + "." + tripleIteration
+            if profile is not None:
+                profile.count('marker_probes')
+            try:
+                if frame in trackA[doubleMark] and frame in trackB[tripleMark]:
+                    return (doubleMark, tripleMark, False)
+            except KeyError:
+                if profile is not None:
+                    profile.count('keyerror_probes')
+
+def solveQueue(index, joints, profile=None, masks=None, previous=None, dropped=None):
+
+    '''Picks the markers for every joint frame and queues up the lines to cross,
+    each (markers, frame) pair once: a marker switch reuses the line crossing of
+    the frame before when that frame was solved with the same markers.  masks
+    optionally limits the queued frames to {joint: (F,) bool array}.  Marker
+    switches with nothing to chain onto, no solved frame before them (in the
+    range or in previous, as given to solveChain) or their markers untracked
+    there, are left out, logged, and listed per joint in the optional dropped
+    dictionary.  An optional SolveProfile gets each joint's matching time and
+    frame counts.
+    Returns (checks, markersA, markersB, frames) for lineCrossFrames and solveChain.'''
+
+    checks = []
+    markersA = []
+    markersB = []
+    frames = []
+    for joint in joints:
+        begin = time.perf_counter() if profile is not None else None
+        pickA, pickB, identical, solvable = index.crossCheck(joint)
+        chainsOnto = bool(previous) and int(index.frames[0]) - 1 in previous.get(joint, {})
+        placed = switchChains(identical, solvable, index.trackedBefore(joint), chainsOnto)
+        lost = solvable & ~placed
+        solvable = placed
+        if masks is not None and joint in masks:
+            solvable = solvable & masks[joint]
+            lost &= masks[joint]
+        if lost.any():
+            lostFrames = index.frames[lost].tolist()
+            log.warning("%s: dropped %d marker switch frames with nothing to chain onto (%s)",
+                        joint, len(lostFrames), _frameSpans(lostFrames))
+            if dropped is not None:
+                dropped[joint] = lostFrames
+        solved = np.flatnonzero(solvable)
+        switch = solved[~identical[solved]]
+
+        # switches onto the markers the frame before was solved with
+        last = switch - 1
+        reuse = ((switch > 0) & solvable[last] & (pickA[last] == pickA[switch]) &
+                 (pickB[last] == pickB[switch]))
+        extra = switch[~reuse]
+
+        # queue rows of this frame for every solved frame and last frame for switches
+        start = len(frames)
+        rows = np.zeros(len(index.frames), dtype='int64')
+        rows[solved] = np.arange(start, start + len(solved))
+        lastRows = np.empty(len(switch), dtype='int64')
+        lastRows[reuse] = rows[switch[reuse] - 1]
+        lastRows[~reuse] = np.arange(start + len(solved), start + len(solved) + len(extra))
+        checks.append((joint, index.frames[solved], identical[solved], rows[solved], lastRows))
+        if profile is not None:
+            profile.joint(joint, matching_seconds=time.perf_counter() - begin,
+                          same_marker_frames=len(solved) - len(switch),
+                          marker_switch_frames=len(switch),
+                          unsolved_frames=len(index.frames) - len(solved),
+                          dropped_frames=int(lost.sum()),
+                          line_crosses=len(solved) + len(extra),
+                          reused_crosses=int(reuse.sum()))
+
+        markersA.extend(pickA[solved].tolist() + pickA[extra].tolist())
+        markersB.extend(pickB[solved].tolist() + pickB[extra].tolist())
+        frames.extend(index.frames[solved].tolist() + (index.frames[extra] - 1).tolist())
+
+    return checks, markersA, markersB, frames
+
+def solveChain(checks, crossed, previous=None, profile=None):
+
+    '''Calculates the midpoint of every queued joint frame from the crossed lines,
+    chaining marker switches onto the previous frame.  A switch lands at its line
+    crossing plus the offset between the frame before's solve and its markers'
+    crossing there, an offset every following switch onto the same markers keeps,
+    so offsets are only worked out where a run of switches starts or changes
+    markers and applied to the whole run at once.  previous optionally holds
+    already solved {joint: {frame: point}} to chain onto, an optional SolveProfile
+    gets each joint's chaining time.  Returns EXPORT dictionary.'''
+
+    EXPORT = {}
+    for joint, solvedFrames, identical, thisRows, lastRows in checks:
+        begin = time.perf_counter() if profile is not None else None
+        before = previous.get(joint, {}) if previous else {}
+        points = crossed[thisRows]
+        solvedPoints = points.tolist()
+
+        switches = np.flatnonzero(~identical)
+        if len(switches):
+            # switches reusing the frame before's crossing carry on its run
+            carries = (switches > 0) & (lastRows == thisRows[switches - 1])
+            runs = np.cumsum(~carries) - 1
+            ordinal = np.full(len(solvedFrames), -1, dtype='int64')
+            ordinal[switches] = runs
+
+            frameList = solvedFrames.tolist()
+            lastPoints = crossed[lastRows[~carries], :3].tolist()
+            offsets = []
+            for s, c in enumerate(switches[~carries].tolist()):
+                w = frameList[c]
+                if c > 0 and frameList[c-1] == w - 1:
+                    prior = solvedPoints[c-1]
+                    if ordinal[c-1] >= 0:
+                        offset = offsets[ordinal[c-1]]
+                        prior = [prior[0] + offset[0], prior[1] + offset[1], prior[2] + offset[2]]
+                else:
+                    prior = before[w-1]
+                offsets.append((prior[0] - lastPoints[s][0], prior[1] - lastPoints[s][1],
+                                prior[2] - lastPoints[s][2]))
+
+            # chained points keep this frame's line distance as their residual
+            chained = np.column_stack((points[switches, :3] +
+                                       np.array(offsets, dtype='float64')[runs],
+                                       points[switches, 3]))
+            for c, point in zip(switches.tolist(), chained.tolist()):
+                solvedPoints[c] = tuple(point)
+
+        EXPORT[joint] = dict(zip(solvedFrames.tolist(), solvedPoints))
+        if profile is not None:
+            profile.joint(joint, chaining_seconds=time.perf_counter() - begin)
+
+    return EXPORT
+
+def jointGroups(joints, groups):
+
+    '''Splits joints into at most groups contiguous lists of near equal length.'''
+
+    groups = max(1, min(groups, len(joints)))
+    size, extra = divmod(len(joints), groups)
+    bounds = np.cumsum([0] + [size + (g < extra) for g in range(groups)]).tolist()
+    return [list(joints[bounds[g]:bounds[g + 1]]) for g in range(groups)]
+
+# take a worker process last loaded from its exports, kept for its next group
+_WORKER_TAKE = (None, None)
+
+def _workerSolve(task):
+    take, joints, model, profiling = task
+    if isinstance(take[0], str):
+        global _WORKER_TAKE
+        paths, dtype = take[:4], take[4]
+        if _WORKER_TAKE[0] != take:
+            _WORKER_TAKE = (take, loadTake(*paths, dtype=dtype, lazy=True))
+        take = _WORKER_TAKE[1]
+    profile = SolveProfile() if profiling else None
+    dropped = {}
+    EXPORT = solve(*take, joints, profile=profile, model=model, dropped=dropped)
+    return EXPORT, profile.toDict() if profiling else None, dropped
+
+def parallelSolve(camA, camB, trackA, trackB, joints, workers, profile=None, model='angles',
+                  paths=None, dtype='float64', pool=None, dropped=None):
+
+    '''Solves groups of joints on a pool of worker processes, each running the
+    whole solve (matching, line crossing and chaining) of its joints, so the
+    result equals a serial solve.  Given the take's 4 export paths (and dtype)
+    workers load the take themselves, parsing only their own joints' markers,
+    otherwise each group carries the take's data.  pool is an open
+    ProcessPoolExecutor to reuse across takes, else one is made for this solve.
+    dropped collects the unchained marker switches, see solveQueue.
+    Returns EXPORT dictionary.'''
+
+    # groups of file backed takes are cheap to send, more of them balance the pool better
+    groups = jointGroups(joints, workers * 4 if paths else workers)
+    if len(groups) < 2:
+        return solve(camA, camB, trackA, trackB, joints, profile=profile, model=model,
+                     dropped=dropped)
+    take = tuple(paths) + (dtype,) if paths else (camA, camB, trackA, trackB)
+    tasks = [(take, group, model, profile is not None) for group in groups]
+
+    if pool is None:
+        # multiprocessing is a large share of importing the package, only parallel solves need it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_workerSolve, tasks))
+    else:
+        results = list(pool.map(_workerSolve, tasks))
+
+    EXPORT = {}
+    for part, partProfile, partDropped in results:
+        EXPORT.update(part)
+        if profile is not None:
+            profile.merge(partProfile)
+        if dropped is not None:
+            dropped.update(partDropped)
+    return EXPORT
+
+def solve(camA, camB, trackA, trackB, joints=None, workers=1, profile=None, model='angles',
+          dropped=None):
+
+    '''Calculates the midpoint of every joint on every solvable frame, splitting
+    the joints over a pool of worker processes if workers > 1 (see
+    parallelSolve).  An optional SolveProfile records the time and counts of
+    every stage and joint.  model picks how tracks become rays, see
+    cameraModel.CAMERA_MODELS.  Marker switches that can't be chained are left
+    out and listed in the optional dropped dictionary, see solveQueue.
+    Returns nested dictionary of {joint: {frame: (x, y, z, ...)}}.'''
+
+    trackRange = solveRange(camA, camB, trackA, trackB)
+    if joints is None:
+        joints = jointList(trackA, trackB)
+    if workers > 1:
+        return parallelSolve(camA, camB, trackA, trackB, joints, workers, profile, model,
+                             dropped=dropped)
+
+    with profiled(profile, 'matching'):
+        index = MarkerIndex(trackA, trackB, joints, trackRange, profile)
+        checks, markersA, markersB, frames = solveQueue(index, joints, profile, dropped=dropped)
+
+    # the rotation matrices are built once per camera and cached for the crossing
+    with profiled(profile, 'rotations'):
+        cameraMatrices(camA, [])
+        cameraMatrices(camB, [])
+
+    # cross every queued line pair in one batch
+    with profiled(profile, 'triangulation'):
+        crossed = lineCrossFrames(markersA, markersB, frames, camA, camB, trackA, trackB, model)
+
+    # calculate midpoint for all joints
+    with profiled(profile, 'chaining'):
+        return solveChain(checks, crossed, profile=profile)
+
+def solveScalar(camA, camB, trackA, trackB, joints=None, profile=None, cacheSize=1024,
+                dropped=None):
+
+    '''Reference solve calling lineCross once per joint frame, see solve().  Line
+    crossings go through a CrossCache of cacheSize, so a marker switch reuses
+    the frame before's crossing of the same markers.'''
+
+    trackRange = solveRange(camA, camB, trackA, trackB)
+    if joints is None:
+        joints = jointList(trackA, trackB)
+    cross = CrossCache(lambda markerA, markerB, frame: lineCross(markerA, markerB, frame, camA,
+                                                                 camB, trackA, trackB),
+                       cacheSize)
+
+    # calculate midpoint for all joints
+    EXPORT = {}
+    for joint in joints:
+        EXPORT[joint] = {}
+        lost = []
+        for w in range(int(trackRange[0]), int(trackRange[1]) + 1):
+            if profile is None:
+                markers = markerCrossCheck(joint, w, trackA, trackB)
+            else:
+                begin = time.perf_counter()
+                markers = markerCrossCheck(joint, w, trackA, trackB, profile)
+                seconds = time.perf_counter() - begin
+                profile.add('matching', seconds)
+                profile.joint(joint, matching_seconds=seconds)
+            if markers is None:
+                if profile is not None:
+                    profile.joint(joint, unsolved_frames=1)
+                continue
+            begin = time.perf_counter() if profile is not None else None
+            if markers[2] is True:
+                EXPORT[joint][w] = cross(markers[0], markers[1], w)
+            else:
+                # a marker switch needs the frame before solved and its markers tracked there
+                try:
+                    lastFrame = cross(markers[0], markers[1], w-1) if w-1 in EXPORT[joint] \
+                        else None
+                except KeyError:
+                    lastFrame = None
+                if lastFrame is None:
+                    lost.append(w)
+                    if profile is not None:
+                        profile.joint(joint, unsolved_frames=1, dropped_frames=1)
+                    continue
+                thisFrame = cross(markers[0], markers[1], w)
+                new_X = (thisFrame[0] - lastFrame[0]) + EXPORT[joint][w-1][0]
+                new_Y = (thisFrame[1] - lastFrame[1]) + EXPORT[joint][w-1][1]
+                new_Z = (thisFrame[2] - lastFrame[2]) + EXPORT[joint][w-1][2]
+                EXPORT[joint][w] = (new_X, new_Y, new_Z)
+            if profile is not None:
+                seconds = time.perf_counter() - begin
+                profile.add('triangulation', seconds)
+                if markers[2] is True:
+                    profile.joint(joint, same_marker_frames=1, line_crosses=1,
+                                  triangulation_seconds=seconds)
+                else:
+                    profile.joint(joint, marker_switch_frames=1, line_crosses=2,
+                                  triangulation_seconds=seconds)
+        if lost:
+            log.warning("%s: dropped %d marker switch frames with nothing to chain onto (%s)",
+                        joint, len(lost), _frameSpans(lost))
+            if dropped is not None:
+                dropped[joint] = lost
+
+    if profile is not None:
+        profile.count('cross_cache_hits', cross.hits)
+        profile.count('cross_cache_misses', cross.misses)
+
+    return EXPORT
+
+def _fileStats(stats, path):
+    if stats is None:
+        return None
+    stats[path] = {}
+    return stats[path]
+
+def _trackerLoad(trackPath, stats, dtype, lazy, sidecar):
+    if lazy:
+        return trackerLazyLoad(open(trackPath, "rb"), dtype, sidecar)
+    return trackerBulkLoad(open(trackPath, "rb"), _fileStats(stats, trackPath), dtype)
+
+def loadTake(camPathA, trackPathA, camPathB, trackPathB, stats=None, dtype='float64', lazy=False,
+             sidecar=False):
+
+    '''Bulk loads one take's 4 exports into dtype arrays.  Optional stats dict
+    receives parse throughput per path.  lazy only indexes the tracker exports,
+    parsing each marker when it's first used (see trackerLazyLoad for sidecar).
+    Returns (camA, camB, trackA, trackB).'''
+
+    camA = cameraBulkLoad(open(camPathA, "rb"), _fileStats(stats, camPathA), dtype)
+    trackA = _trackerLoad(trackPathA, stats, dtype, lazy, sidecar)
+    camB = cameraBulkLoad(open(camPathB, "rb"), _fileStats(stats, camPathB), dtype)
+    trackB = _trackerLoad(trackPathB, stats, dtype, lazy, sidecar)
+
+    return camA, camB, trackA, trackB
+
+def solveTake(camPathA, trackPathA, camPathB, trackPathB, exportPath, stats=None, workers=1,
+              binary=False, profile=None, residuals=False, cleanup=None, dtype='float64',
+              joints=None, sidecar=False, model='angles', pool=None):
+
+    '''Reads one take's exports, solves it and writes the solve to exportPath,
+    plus a binary solve alongside it if binary is set (else removing a stale
+    one of an earlier run).  An optional SolveProfile is filled in and written
+    as mocapSolved.profile.json next to the solve.
+    residuals adds a residual column and mocapSolved.residuals.json statistics.
+    cleanup(EXPORT, trackRange), e.g. a filterSolve partial, returns the solve to write.
+    dtype 'float32' halves the parsed and crossed arrays and the binary solve,
+    see trackData.PRECISIONS.  Given joints only they are solved, parsing only
+    their markers, sidecar keeps a marker index next to each tracker export.
+    model is the camera model tracks are projected with.  With workers > 1 the
+    take is only indexed here and each worker process loads the joints it
+    solves, pool optionally being a ProcessPoolExecutor shared across takes.'''
+
+    parallel = workers > 1
+    with profiled(profile, 'parse'):
+        camA, camB, trackA, trackB = loadTake(camPathA, trackPathA, camPathB, trackPathB, stats,
+                                              dtype, joints is not None or sidecar or parallel,
+                                              sidecar)
+
+    trackRange = solveRange(camA, camB, trackA, trackB)
+    if parallel:
+        EXPORT = parallelSolve(camA, camB, trackA, trackB,
+                               jointList(trackA, trackB) if joints is None else joints,
+                               workers, profile, model,
+                               (camPathA, trackPathA, camPathB, trackPathB), dtype, pool)
+    else:
+        EXPORT = solve(camA, camB, trackA, trackB, joints, profile=profile, model=model)
+    if cleanup is not None:
+        with profiled(profile, 'cleanup'):
+            EXPORT = cleanup(EXPORT, trackRange)
+
+    with profiled(profile, 'export'):
+        with open(exportPath, "x") as dataFile:
+            solveWrite(dataFile, EXPORT, (camA['clip'], camB['clip']), trackRange, residuals)
+        if residuals:
+            residualWrite(residualPath(exportPath), EXPORT, trackRange)
+        if binary:
+            with open(binaryPath(exportPath), "xb") as dataFile:
+                binaryWrite(dataFile, EXPORT, (camA['clip'], camB['clip']), trackRange, dtype)
+        else:
+            binaryDiscard(exportPath)
+
+    if profile is not None:
+        profile.write(profilePath(exportPath))
+
+    return exportPath
+
+def solveTakeMulti(camPaths, trackPaths, exportPath, stats=None, binary=False, residuals=False,
+                   cleanup=None, dtype='float64', joints=None, sidecar=False, model='angles'):
+
+    '''Reads the exports of any number of cameras of one take, solves them together
+    and writes the solve to exportPath, plus a binary solve if binary is set
+    (else removing a stale one).
+    residuals adds a residual column and mocapSolved.residuals.json statistics.
+    cleanup(EXPORT, trackRange) returns the solve to write, dtype sets the
+    storage precision, joints and sidecar pick the joints and model is the camera
+    model, as in solveTake.'''
+
+    cams = []
+    tracks = []
+    for camPath, trackPath in zip(camPaths, trackPaths):
+        cams.append(cameraBulkLoad(open(camPath, "rb"), _fileStats(stats, camPath), dtype))
+        tracks.append(_trackerLoad(trackPath, stats, dtype, joints is not None or sidecar,
+                                   sidecar))
+
+    trackRange = solveRangeMulti(cams, tracks)
+    EXPORT = solveMulti(cams, tracks, joints, model)
+    if cleanup is not None:
+        EXPORT = cleanup(EXPORT, trackRange)
+
+    with open(exportPath, "x") as dataFile:
+        solveWrite(dataFile, EXPORT, [cam['clip'] for cam in cams], trackRange, residuals)
+    if residuals:
+        residualWrite(residualPath(exportPath), EXPORT, trackRange)
+    if binary:
+        with open(binaryPath(exportPath), "xb") as dataFile:
+            binaryWrite(dataFile, EXPORT, [cam['clip'] for cam in cams], trackRange, dtype)
+    else:
+        binaryDiscard(exportPath)
+
+    return exportPath
+
+def defaultExportPath(camPathA):
+
+    '''mocapSolved.txt alongside the first camera export.'''
+
+    return os.path.join(os.path.dirname(os.path.abspath(camPathA)), "mocapSolved.txt")
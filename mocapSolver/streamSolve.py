@@ -0,0 +1,241 @@
+# streaming solve, reads, solves and writes a take one frame window at a time
+
+import mmap
+import os
+import tempfile
+
+from .bulkRead import (SECTION, CAMERA_HEADER, TRACKER_HEADER, _headerRead, _headerCheck,
+                       _blockRead, _firstRow, trackerSections)
+from .trackData import CameraData, MarkerData, TrackerData
+from .markerIndex import MarkerIndex
+from .vectorTriangulate import lineCrossFrames
+from .solver import solveRange, solveQueue, solveChain
+from .solveExport import solveHeader, solveRows
+from .solveBinary import binaryDiscard
+
+def _rowFrame(mapped, offset, end):
+
+    '''Frame number of the row starting at offset, None for a blank line.'''
+
+    stop = offset
+    while stop < end and mapped[stop:stop + 1] not in (b" ", b"\n", b"\r"):
+        stop += 1
+    return int(mapped[offset:stop]) if stop > offset else None
+
+def rowAfter(mapped, start, end, lastFrame):
+
+    '''Offset of the first row between start and end whose frame comes after
+    lastFrame, found by bisecting the rows (which are in frame order).'''
+
+    lo = start
+    hi = end
+    while lo < hi:
+        mid = (lo + hi) // 2
+        row = mapped.find(b"\n", mid, hi) + 1
+        if row == 0 or row >= hi:
+            # no row starts between mid and hi, step past the row at lo
+            row = lo
+        frame = _rowFrame(mapped, row, hi)
+        if frame is None or frame > lastFrame:
+            hi = row
+        else:
+            following = mapped.find(b"\n", row, hi)
+            lo = hi if following == -1 else following + 1
+    return lo
+
+class ExportWindows:
+
+    '''A memory-mapped camera or tracker export that hands out frame windows.'''
+
+    __slots__ = ('mapped', 'path', 'header', 'blocks', 'camera')
+
+    def __init__(self, EXPORT_FILE):
+        self.path = getattr(EXPORT_FILE, 'name', "export")
+        try:
+            self.mapped = mmap.mmap(EXPORT_FILE.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            EXPORT_FILE.close()
+        sections = trackerSections(self.mapped)
+        self.camera = not sections
+        if self.camera:
+            first = _firstRow(self.mapped, max(self.mapped.find(b"ANGLE OF VIEW"), 0))
+            self.header = _headerRead(self.mapped, first)
+            self.blocks = [(None, first, len(self.mapped))]
+        else:
+            self.header = _headerRead(self.mapped, self.mapped.find(SECTION))
+            self.blocks = [(name, start + 1, end) for name, start, end in sections]
+        # the same checks as the bulk loaders, so both reject a bad export alike
+        try:
+            _headerCheck(self.header, CAMERA_HEADER if self.camera else TRACKER_HEADER,
+                         self.path)
+        except ValueError:
+            self.mapped.close()
+            raise
+
+    def close(self):
+        self.mapped.close()
+
+    @property
+    def frameRange(self):
+        return (int(self.header['RANGE'][0]), int(self.header['RANGE'][2]))
+
+    @property
+    def markers(self):
+        return [name for name, start, end in self.blocks]
+
+    def _rows(self, start, end, firstFrame, lastFrame, width):
+        rowStart = rowAfter(self.mapped, start, end, firstFrame - 1)
+        rowEnd = rowAfter(self.mapped, rowStart, end, lastFrame)
+        return _blockRead(self.mapped, rowStart, rowEnd, width, path=self.path)
+
+    def window(self, firstFrame, lastFrame):
+
+        '''CameraData or TrackerData holding only firstFrame to lastFrame.'''
+
+        header = self.header
+        if self.camera:
+            name, start, end = self.blocks[0]
+            return CameraData(clip=header['EXPORT'], frameRange=self.frameRange,
+                              resolution=(int(header['RESOLUTION'][0]),
+                                          int(header['RESOLUTION'][2])),
+                              sensor=(float(header['SENSOR(mm)'][0]),
+                                      float(header['SENSOR(mm)'][2])),
+                              lens=float(header['LENS(mm)'][0]),
+                              aov=(float(header['ANGLE'][2]), float(header['ANGLE'][4])),
+                              data=self._rows(start, end, firstFrame, lastFrame, 7))
+        markers = {}
+        for name, start, end in self.blocks:
+            rows = self._rows(start, end, firstFrame, lastFrame, 3)
+            markers[name] = MarkerData.fromRows(name, rows[:, 0].astype('int64'), rows[:, 1:])
+        return TrackerData(clip=header['EXPORT'], frameRange=self.frameRange,
+                           resolution=(int(header['RESOLUTION'][0]),
+                                       int(header['RESOLUTION'][2])),
+                           trackNum=int(header['NUMBER'][-1]), markers=markers)
+
+def _exportsOpen(paths):
+
+    '''ExportWindows of each path, closing those already open if one is rejected.'''
+
+    exports = []
+    try:
+        for path in paths:
+            exports.append(ExportWindows(open(path, "rb")))
+    except Exception:
+        for export in exports:
+            export.close()
+        raise
+    return exports
+
+def takeWindows(camA, camB, trackA, trackB, trackRange, window):
+
+    '''Yields (first frame, last frame, (camA, camB, trackA, trackB)) for each
+    window of the range.  Each window's data also holds the frame before it,
+    which marker switches on the window's first frame cross lines on.'''
+
+    for first in range(trackRange[0], trackRange[1] + 1, window):
+        last = min(first + window - 1, trackRange[1])
+        yield first, last, tuple(export.window(first - 1, last)
+                                 for export in (camA, camB, trackA, trackB))
+
+def solveWindows(windows, joints):
+
+    '''Solves each window of takeWindows, chaining marker switches across window
+    edges.  Yields (first frame, last frame, EXPORT) per window.'''
+
+    previous = {}
+    for first, last, (camA, camB, trackA, trackB) in windows:
+        index = MarkerIndex(trackA, trackB, joints, (first, last))
+        checks, markersA, markersB, frames = solveQueue(index, joints, previous=previous)
+        crossed = lineCrossFrames(markersA, markersB, frames, camA, camB, trackA, trackB)
+        EXPORT = solveChain(checks, crossed, previous)
+        previous = {joint: {last: EXPORT[joint][last]}
+                    for joint in EXPORT if last in EXPORT[joint]}
+        yield first, last, EXPORT
+
+def streamWrite(exportPath, solved, joints, clips, trackRange):
+
+    '''Appends every solved window to a single spool file as it arrives, keeping
+    each joint's offsets into it, then joins each joint's rows into exportPath
+    in the mocapSolved.txt format.'''
+
+    with open(exportPath, "x") as dataFile:
+        with tempfile.TemporaryFile(prefix=".mocapSolved-",
+                                    dir=os.path.dirname(os.path.abspath(exportPath))) as spool:
+            # (offset, size) of each window's rows of each joint
+            chunks = [[] for joint in joints]
+            for first, last, EXPORT in solved:
+                for j, joint in enumerate(joints):
+                    rows = "".join(solveRows(EXPORT[joint])).encode()
+                    if rows:
+                        chunks[j].append((spool.tell(), len(rows)))
+                        spool.write(rows)
+
+            solveHeader(dataFile, clips, trackRange)
+            for j, joint in enumerate(joints):
+                dataFile.write("\n##### {}\n".format(joint))
+                for offset, size in chunks[j]:
+                    spool.seek(offset)
+                    dataFile.write(spool.read(size).decode())
+
+def _windowJoints(trackA, trackB):
+
+    '''Joints of 2 tracker ExportWindows in the order trackerRead would list them.'''
+
+    joints = []
+    for marker in trackA.markers + trackB.markers:
+        joint = marker.split(".")[0]
+        if joint not in joints:
+            joints.append(joint)
+    return joints
+
+def solveTakeWindowed(camPathA, trackPathA, camPathB, trackPathB, window=1000, progress=None):
+
+    '''Solves one take window by window into memory, calling progress(frames done,
+    frames in range) after every window so a caller can report on (or stop, by
+    raising) a long solve.  Returns (EXPORT, clips, trackRange).'''
+
+    exports = _exportsOpen((camPathA, camPathB, trackPathA, trackPathB))
+    try:
+        camA, camB, trackA, trackB = exports
+        headers = [export.window(0, -1) for export in exports]
+        trackRange = solveRange(*headers)
+        joints = _windowJoints(trackA, trackB)
+
+        EXPORT = {joint: {} for joint in joints}
+        total = trackRange[1] - trackRange[0] + 1
+        if progress is not None:
+            progress(0, total)
+        windows = takeWindows(camA, camB, trackA, trackB, trackRange, window)
+        for first, last, solved in solveWindows(windows, joints):
+            for joint in joints:
+                EXPORT[joint].update(solved[joint])
+            if progress is not None:
+                progress(last - trackRange[0] + 1, total)
+    finally:
+        for export in exports:
+            export.close()
+
+    return EXPORT, (headers[0]['clip'], headers[1]['clip']), trackRange
+
+def solveTakeStreaming(camPathA, trackPathA, camPathB, trackPathB, exportPath, window=1000):
+
+    '''Solves one take window by window so memory is bounded by the window size,
+    not the take length.  Writes the same mocapSolved.txt as solveTake, removing
+    a binary solve of an earlier run.'''
+
+    exports = _exportsOpen((camPathA, camPathB, trackPathA, trackPathB))
+    try:
+        camA, camB, trackA, trackB = exports
+        headers = [export.window(0, -1) for export in exports]
+        trackRange = solveRange(*headers)
+
+        joints = _windowJoints(trackA, trackB)
+        windows = takeWindows(camA, camB, trackA, trackB, trackRange, window)
+        streamWrite(exportPath, solveWindows(windows, joints), joints,
+                    (headers[0]['clip'], headers[1]['clip']), trackRange)
+        binaryDiscard(exportPath)
+    finally:
+        for export in exports:
+            export.close()
+
+    return exportPath
@@ -0,0 +1,275 @@
+# compact array-backed camera and tracker data, parsed once from the exports
+
+import numpy as np
+
+# storage precisions of the parsed arrays, lines are always crossed in float64
+PRECISIONS = ('float64', 'float32')
+
+class CameraData:
+
+    '''Camera export held as one float64 (or float32) array of (frame, loc xyz,
+    rot xyz) rows.  Indexing by frame or header name mirrors the dictionaries
+    made by cameraRead.  matrices caches the per-row rotation matrices once
+    cameraMatrices builds them.'''
+
+    __slots__ = ('clip', 'frameRange', 'resolution', 'sensor', 'lens', 'aov', 'data',
+                 'matrices', '_first', '_contiguous')
+
+    HEADERS = {'clip': 'clip', 'frame_range': 'frameRange', 'resolution': 'resolution',
+               'sensor': 'sensor', 'lens': 'lens', 'aov': 'aov'}
+
+    def __init__(self, clip, frameRange, resolution, sensor, lens, aov, data, dtype='float64'):
+        self.clip = clip
+        self.frameRange = frameRange
+        self.resolution = resolution
+        self.sensor = sensor
+        self.lens = lens
+        self.aov = aov
+        self.data = np.asarray(data, dtype=dtype).reshape(-1, 7)
+        self.matrices = None
+        self._first = int(self.data[0, 0]) if len(self.data) else 0
+        self._contiguous = bool(np.all(np.diff(self.data[:, 0]) == 1))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, self.HEADERS[key])
+        row = self.data[self.index(key)]
+        return tuple(row[1:].tolist())
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self.HEADERS
+        return bool(self.has(key))
+
+    @property
+    def frames(self):
+        return self.data[:, 0].astype('int64')
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def has(self, frames):
+
+        '''True where the camera has a transform for the frame.'''
+
+        frames = np.asarray(frames)
+        if self._contiguous:
+            return (frames >= self._first) & (frames < self._first + len(self.data))
+        index = np.searchsorted(self.data[:, 0], frames).clip(0, max(len(self.data) - 1, 0))
+        return self.data[index, 0] == frames
+
+    def index(self, frames):
+
+        '''Row index of each frame, raises KeyError for frames without a transform.'''
+
+        has = self.has(frames)
+        if not np.all(has):
+            missing = np.asarray(frames)[~has] if np.ndim(has) else frames
+            raise KeyError(np.asarray(missing).tolist())
+        if self._contiguous:
+            return np.asarray(frames, dtype='int64') - self._first
+        return np.searchsorted(self.data[:, 0], frames)
+
+    def origins(self, frames):
+
+        '''Camera locations for each frame.  Returns (N, 3) array.'''
+
+        return self.data[self.index(frames), 1:4]
+
+    def rotations(self, frames):
+
+        '''Camera euler rotations for each frame.  Returns (N, 3) array.'''
+
+        return self.data[self.index(frames), 4:7]
+
+class MarkerData:
+
+    '''One tracked marker over its frame span: frame numbers, (N, 2) normalized
+    positions and a mask of the frames it was actually tracked on.'''
+
+    __slots__ = ('name', 'frames', 'co', 'valid')
+
+    def __init__(self, name, frames, co, valid=None, dtype='float64'):
+        self.name = name
+        self.frames = np.asarray(frames, dtype='int32')
+        self.co = np.asarray(co, dtype=dtype).reshape(-1, 2)
+        if valid is None:
+            valid = np.ones(len(self.frames), dtype='bool')
+        self.valid = np.asarray(valid, dtype='bool')
+
+    @classmethod
+    def fromRows(cls, name, frames, co, dtype='float64'):
+
+        '''Spreads sparse (frame, x, y) rows over the marker's whole frame span.'''
+
+        frames = np.asarray(frames, dtype='int64')
+        co = np.asarray(co, dtype=dtype).reshape(-1, 2)
+        if not len(frames):
+            return cls(name, frames, co, dtype=dtype)
+        first = frames.min()
+        span = np.arange(first, frames.max() + 1)
+        dense = np.zeros((len(span), 2), dtype=dtype)
+        valid = np.zeros(len(span), dtype='bool')
+        dense[frames - first] = co
+        valid[frames - first] = True
+        return cls(name, span, dense, valid, dtype)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.valid))
+
+    def __iter__(self):
+        return iter(self.frames[self.valid].tolist())
+
+    def __getitem__(self, frame):
+        if frame not in self:
+            raise KeyError(frame)
+        return tuple(self.co[frame - self.frames[0]].tolist())
+
+    def __contains__(self, frame):
+        if not len(self.frames):
+            return False
+        index = frame - int(self.frames[0])
+        return 0 <= index < len(self.frames) and bool(self.valid[index])
+
+    def has(self, frames):
+
+        '''True where the marker was tracked on each frame.'''
+
+        frames = np.asarray(frames)
+        if not len(self.frames):
+            return np.zeros(frames.shape, dtype='bool')
+        index = frames - self.frames[0]
+        inside = (index >= 0) & (index < len(self.frames))
+        return inside & self.valid[np.where(inside, index, 0)]
+
+    def positions(self, frames):
+
+        '''Normalized track positions for each frame.  Returns (N, 2) array.'''
+
+        frames = np.asarray(frames)
+        if not np.all(self.has(frames)):
+            raise KeyError(self.name)
+        return self.co[frames - self.frames[0]]
+
+class TrackerData:
+
+    '''Tracker export held as MarkerData per marker.  Indexing by marker or header
+    name mirrors the dictionaries made by trackerRead.'''
+
+    __slots__ = ('clip', 'frameRange', 'resolution', 'trackNum', 'markers')
+
+    HEADERS = {'clip': 'clip', 'frame_range': 'frameRange', 'resolution': 'resolution',
+               'track_num': 'trackNum'}
+
+    def __init__(self, clip, frameRange, resolution, trackNum, markers):
+        self.clip = clip
+        self.frameRange = frameRange
+        self.resolution = resolution
+        self.trackNum = trackNum
+        self.markers = markers
+
+    def __getitem__(self, key):
+        if key in self.HEADERS:
+            return getattr(self, self.HEADERS[key])
+        return self.markers[key]
+
+    def __contains__(self, key):
+        return key in self.HEADERS or key in self.markers
+
+    def __iter__(self):
+        yield from self.HEADERS
+        yield from self.markers
+
+    @property
+    def dtype(self):
+        # markers parsed on demand know their precision before any are parsed
+        if hasattr(self.markers, 'dtype'):
+            return self.markers.dtype
+        for marker in self.markers.values():
+            return marker.co.dtype
+        return np.dtype('float64')
+
+    def positions(self, markers, frames):
+
+        '''Track positions for parallel sequences of markers and frames.
+        Returns (N, 2) array.'''
+
+        frames = np.asarray(frames)
+        positions = np.empty((len(frames), 2), dtype=self.dtype)
+
+        # rows of each marker, gathered without building a string array
+        rows = {}
+        for row, marker in enumerate(markers):
+            rows.setdefault(marker, []).append(row)
+        for marker, pick in rows.items():
+            positions[pick] = self.markers[marker].positions(frames[pick])
+        return positions
+
+def cameraLoad(CAMERA_FILE):
+
+    '''Reads blender camera data export files into CameraData.'''
+
+    header = {}
+    rows = []
+
+    for c, line in enumerate(CAMERA_FILE):
+        if c == 0:
+            header['clip'] = line[23:-1]
+        elif c == 2:
+            split = line[:-1].split(" ")
+            header['frameRange'] = (int(split[1]), int(split[3]))
+        elif c == 4:
+            split = line[:-1].split(" ")
+            header['resolution'] = (int(split[1]), int(split[3]))
+        elif c == 6:
+            split = line[:-1].split(" ")
+            header['sensor'] = (float(split[1]), float(split[3]))
+        elif c == 8:
+            split = line[:-1].split(" ")
+            header['lens'] = float(split[1])
+        elif c == 10:
+            split = line[:-1].split(" ")
+            header['aov'] = (float(split[3]), float(split[5]))
+        elif c > 12:
+            rows.append(line.split()[:7])
+
+    CAMERA_FILE.close()
+    return CameraData(data=np.array(rows, dtype='float64'), **header)
+
+def trackerLoad(TRACKER_FILE):
+
+    '''Reads blender tracker data export files into TrackerData.'''
+
+    header = {}
+    sections = []
+
+    for t, line in enumerate(TRACKER_FILE):
+        if t == 0:
+            header['clip'] = line[24:-1]
+        elif t == 2:
+            split = line[:-1].split(" ")
+            header['frameRange'] = (int(split[1]), int(split[3]))
+        elif t == 4:
+            split = line[:-1].split(" ")
+            header['resolution'] = (int(split[1]), int(split[3]))
+        elif t == 6:
+            split = line[:-1].split(" ")
+            header['trackNum'] = int(split[-1])
+        elif t > 8:
+            split = line[:-1].split(" ")
+            if split[0] == "#####":
+                sections.append((split[1], []))
+            elif len(split) > 2:
+                sections[-1][1].append(split[:3])
+
+    TRACKER_FILE.close()
+
+    markers = {}
+    for name, rows in sections:
+        rows = np.array(rows, dtype='float64').reshape(-1, 3)
+        markers[name] = MarkerData.fromRows(name, rows[:, 0].astype('int64'), rows[:, 1:])
+    return TrackerData(markers=markers, **header)
@@ -0,0 +1,182 @@
+# post-solve cleanup, fills gaps in and smooths each joint's whole trajectory as arrays
+
+import numpy as np
+
+from .solveBinary import solveArrays
+
+FILL_METHODS = ('linear', 'cubic')
+SMOOTH_METHODS = ('savgol', 'gaussian')
+
+def gapLengths(valid):
+
+    '''Length of the gap each frame sits in, 0 on valid frames and frames before
+    the first or after the last valid one (which are never filled).'''
+
+    valid = np.asarray(valid, dtype='bool')
+    known = np.flatnonzero(valid)
+    lengths = np.zeros(len(valid), dtype='int64')
+    if len(known) < 2:
+        return lengths
+    gaps = np.diff(known) - 1
+    inside = np.arange(known[0], known[-1] + 1)
+    gap = np.searchsorted(known, inside) - 1
+    lengths[inside] = np.where(valid[inside], 0, gaps[np.maximum(gap, 0)])
+    return lengths
+
+def _tangent(before, here, after, frameBefore, frame, frameAfter):
+
+    '''Velocity at here from its neighbouring valid frames, the three point
+    estimate for uneven spacing and one sided at the ends of the track.'''
+
+    h0 = (frame - frameBefore)[:, None].astype('float64')
+    h1 = (frameAfter - frame)[:, None].astype('float64')
+    slope0 = (here - before) / np.maximum(h0, 1)
+    slope1 = (after - here) / np.maximum(h1, 1)
+    mixed = (h1 * slope0 + h0 * slope1) / np.maximum(h0 + h1, 1)
+    return np.where(h0 == 0, slope1, np.where(h1 == 0, slope0, mixed))
+
+def fillGaps(points, valid, method='linear', maxGap=None):
+
+    '''Interpolates a (F, 3) trajectory over the invalid frames between valid ones,
+    linearly or with a cubic Hermite spline whose tangents come from the
+    neighbouring valid frames.  Gaps longer than maxGap frames are left.
+    Returns (filled (F, 3) points, (F,) bool validity of the result).'''
+
+    if method not in FILL_METHODS:
+        raise ValueError("fill method must be one of {}, not {!r}".format(FILL_METHODS, method))
+
+    points = np.array(points, dtype='float64')
+    valid = np.asarray(valid, dtype='bool')
+    lengths = gapLengths(valid)
+    fill = lengths > 0
+    if maxGap is not None:
+        fill &= lengths <= maxGap
+    if not fill.any():
+        return points, valid.copy()
+
+    known = np.flatnonzero(valid)
+    frames = np.flatnonzero(fill)
+    if method == 'linear':
+        for axis in range(3):
+            points[frames, axis] = np.interp(frames, known, points[known, axis])
+    else:
+        # the valid frames either side of each filled frame and their neighbours
+        k = np.searchsorted(known, frames)
+        km = known[np.maximum(k - 2, 0)]
+        k0 = known[k - 1]
+        k1 = known[k]
+        kp = known[np.minimum(k + 1, len(known) - 1)]
+        p0 = points[k0]
+        p1 = points[k1]
+        span = (k1 - k0)[:, None].astype('float64')
+        t = ((frames - k0) / (k1 - k0))[:, None]
+        t2 = t * t
+        t3 = t2 * t
+
+        m0 = _tangent(points[km], p0, p1, km, k0, k1) * span
+        m1 = _tangent(p0, p1, points[kp], k0, k1, kp) * span
+        points[frames] = ((2 * t3 - 3 * t2 + 1) * p0 + (t3 - 2 * t2 + t) * m0 +
+                          (-2 * t3 + 3 * t2) * p1 + (t3 - t2) * m1)
+
+    return points, valid | fill
+
+def savgolKernels(window, order):
+
+    '''Savitzky-Golay weights of an odd window fitting polynomials of order, one
+    row per frame of the window the fit is evaluated at, the middle row being
+    the usual smoothing kernel.  Returns (window, window) weights.'''
+
+    if window % 2 == 0 or window < 3:
+        raise ValueError("Savitzky-Golay window must be an odd number of frames, 3 or more")
+    if order >= window:
+        raise ValueError("Savitzky-Golay order must be less than the window")
+    offsets = np.arange(-(window // 2), window // 2 + 1, dtype='float64')
+    vandermonde = np.vander(offsets, order + 1, increasing=True)
+    return vandermonde @ np.linalg.pinv(vandermonde)
+
+def gaussianKernel(window):
+
+    '''Normalised gaussian low-pass weights over an odd window, 3 sigma each side.'''
+
+    if window % 2 == 0 or window < 3:
+        raise ValueError("Gaussian window must be an odd number of frames, 3 or more")
+    half = window // 2
+    weights = np.exp(-0.5 * (np.arange(-half, half + 1) / (half / 3)) ** 2)
+    return weights / weights.sum()
+
+def runBounds(valid):
+
+    '''First and last frame of the run of valid frames each frame is in.'''
+
+    valid = np.asarray(valid, dtype='bool')
+    frames = np.arange(len(valid))
+    starts = valid & ~np.r_[False, valid[:-1]]
+    ends = valid & ~np.r_[valid[1:], False]
+    runStart = np.maximum.accumulate(np.where(starts, frames, 0))
+    runEnd = np.minimum.accumulate(np.where(ends, frames, len(valid) - 1)[::-1])[::-1]
+    return runStart, runEnd
+
+def smoothTrack(points, valid, method='savgol', window=9, order=3):
+
+    '''Smooths a (F, 3) trajectory in one pass over all frames, each run of valid
+    frames on its own so gaps are never smoothed across.  Savitzky-Golay fits
+    the window shifted inside the run near its ends and leaves runs shorter
+    than the window as they are, the gaussian low-pass drops the weights
+    outside the run.  Returns (F, 3) points, invalid frames untouched.'''
+
+    if method not in SMOOTH_METHODS:
+        raise ValueError("smooth method must be one of {}, not {!r}".format(SMOOTH_METHODS,
+                                                                            method))
+
+    points = np.asarray(points, dtype='float64')
+    valid = np.asarray(valid, dtype='bool')
+    frames = np.arange(len(valid))
+    runStart, runEnd = runBounds(valid)
+    half = window // 2
+    offsets = np.arange(-half, half + 1)
+
+    if method == 'savgol':
+        kernels = savgolKernels(window, order)
+        # shift windows poking out of their run back inside it
+        shift = np.maximum(runStart - (frames - half), 0)
+        shift = np.where(shift > 0, shift, np.minimum(runEnd - (frames + half), 0))
+        source = np.clip(frames[:, None] + shift[:, None] + offsets, 0, len(valid) - 1)
+        weights = kernels[half - shift.clip(-half, half)]
+        valid = valid & (runEnd - runStart + 1 >= window)
+    else:
+        source = frames[:, None] + offsets
+        inside = (source >= runStart[:, None]) & (source <= runEnd[:, None])
+        weights = gaussianKernel(window) * inside
+        weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-300)
+        source = source.clip(0, len(valid) - 1)
+
+    smoothed = np.einsum('fk,fkc->fc', weights, points[source])
+    return np.where(valid[:, None], smoothed, points)
+
+def filterSolve(EXPORT, trackRange, fill=None, maxGap=None, smooth=None, window=9, order=3):
+
+    '''Gap fills (fill 'linear' or 'cubic') and then smooths (smooth 'savgol' or
+    'gaussian') every joint of a solve.  Solved frames keep their residual, filled
+    frames have none.  Returns EXPORT dictionary.'''
+
+    joints, positions, valid = solveArrays(EXPORT, trackRange)
+    first = int(trackRange[0])
+    FILTERED = {}
+    for j, joint in enumerate(joints):
+        points = positions[j]
+        solved = valid[j].astype('bool')
+        known = solved
+        if fill is not None:
+            points, known = fillGaps(points, solved, fill, maxGap)
+        if smooth is not None:
+            points = smoothTrack(points, known, smooth, window, order)
+
+        frames = np.flatnonzero(known)
+        FILTERED[joint] = {}
+        for f, point in zip(frames.tolist(), points[frames].tolist()):
+            original = EXPORT[joint].get(f + first)
+            if original is not None and len(original) > 3:
+                FILTERED[joint][f + first] = tuple(point) + (original[3],)
+            else:
+                FILTERED[joint][f + first] = tuple(point)
+    return FILTERED
@@ -0,0 +1,171 @@
+# batched numpy triangulation, solves whole frame ranges in one set of array operations
+
+import numpy as np
+
+from .trackData import CameraData, TrackerData
+from .cameraModel import CameraIntrinsics, cameraLens
+
+def _floats(values):
+
+    '''values as a float32 or float64 array, keeping float32 as it is.'''
+
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values
+    return values.astype('float64', copy=False)
+
+def axisMatrices(axis, angles):
+
+    '''Stacked rotation matrices about a single world axis ('X', 'Y' or 'Z').
+    Returns (N, 3, 3) array.'''
+
+    angles = _floats(angles)
+    c = np.cos(angles)
+    s = np.sin(angles)
+    one = np.ones_like(angles)
+    zero = np.zeros_like(angles)
+
+    if axis == 'X':
+        rows = ((one, zero, zero), (zero, c, -s), (zero, s, c))
+    elif axis == 'Y':
+        rows = ((c, zero, s), (zero, one, zero), (-s, zero, c))
+    elif axis == 'Z':
+        rows = ((c, -s, zero), (s, c, zero), (zero, zero, one))
+    else:
+        raise ValueError("axis must be 'X', 'Y' or 'Z', not {!r}".format(axis))
+
+    return np.stack([np.stack(row, axis=-1) for row in rows], axis=-2)
+
+def eulerMatrices(rotations):
+
+    '''Stacked XYZ euler rotation matrices (Rz * Ry * Rx) for (N, 3) radians.
+    Returns (N, 3, 3) array.'''
+
+    rotations = _floats(rotations)
+    return (axisMatrices('Z', rotations[..., 2]) @ axisMatrices('Y', rotations[..., 1])
+            @ axisMatrices('X', rotations[..., 0]))
+
+def localRays(aov, trackPos):
+
+    '''Camera-space unit direction through each tracked point, the camera's -Z axis
+    turned about X then Y by the angle of view compensation of angleOfViewCalc.
+    aov is (x, y) radians or (N, 2), trackPos is (N, 2).  Returns (N, 3) array in
+    trackPos' precision.'''
+
+    trackPos = _floats(trackPos)
+    aov = np.asarray(aov, dtype=trackPos.dtype)
+
+    # Rx(z adjusts x) * Ry(-(x adjusts y)) * (0, 0, -1) in closed form
+    trackAOV = (trackPos - 0.5) * aov
+    cosY = np.cos(trackAOV[..., 0])
+    return np.stack((np.sin(trackAOV[..., 0]),
+                     cosY * np.sin(trackAOV[..., 1]),
+                     -1 * cosY * np.cos(trackAOV[..., 1])), axis=-1)
+
+def rayDirections(rotations, aov, trackPos, matrices=None):
+
+    '''Unit direction of the line from the camera through each tracked point.
+    rotations is (N, 3) camera eulers, aov is (x, y) radians or (N, 2), or a
+    CameraIntrinsics for pinhole rays, trackPos is (N, 2) normalized track
+    positions.  matrices optionally gives the (N, 3, 3) eulerMatrices of
+    rotations already.  Returns (N, 3) array.'''
+
+    if matrices is None:
+        matrices = eulerMatrices(rotations)
+    if isinstance(aov, CameraIntrinsics):
+        local = aov.rays(trackPos)
+    else:
+        local = localRays(aov, trackPos)
+    return np.einsum('nij,nj->ni', matrices, local)
+
+def closestPointsBetweenRays(a0, aDir, b0, bDir):
+
+    '''Closest points of line pairs given by origins and unit directions, all (N, 3).
+    float32 rays are crossed in float64, the denominator vanishing for near
+    parallel lines, and the points returned in float32.
+    Returns (pA, pB, distance), parallel pairs are NaN.'''
+
+    dtype = np.result_type(a0, aDir, b0, bDir)
+    a0, aDir, b0, bDir = (np.asarray(array, dtype='float64') for array in (a0, aDir, b0, bDir))
+    cross = np.cross(aDir, bDir)
+    denom = np.einsum('ij,ij->i', cross, cross)
+
+    # closed form of the determinants in closestDistanceBetweenLines
+    t = b0 - a0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t0 = np.einsum('ij,ij->i', np.cross(t, bDir), cross) / denom
+        t1 = np.einsum('ij,ij->i', np.cross(t, aDir), cross) / denom
+    t0[denom == 0] = np.nan
+    t1[denom == 0] = np.nan
+
+    pA = a0 + aDir * t0[:, None]
+    pB = b0 + bDir * t1[:, None]
+
+    distance = np.linalg.norm(pA - pB, axis=1)
+    return tuple(array.astype(dtype, copy=False) for array in (pA, pB, distance))
+
+def lineCrossBatch(originA, rotationA, aovA, trackPosA, originB, rotationB, aovB, trackPosB,
+                   matricesA=None, matricesB=None):
+
+    '''Batched lineCross over (N, 3) camera origins and rotations and (N, 2) track
+    positions for each camera, optionally with the rotations' (N, 3, 3) matrices
+    precomputed.  Returns (N, 4) array of (x, y, z, distance).'''
+
+    pA, pB, distance = closestPointsBetweenRays(
+        _floats(originA),
+        rayDirections(rotationA, aovA, trackPosA, matricesA),
+        _floats(originB),
+        rayDirections(rotationB, aovB, trackPosB, matricesB))
+
+    return np.column_stack(((pA + pB) / 2, distance))
+
+def cameraArrays(cameraTransform, frames):
+
+    '''Camera origins and rotations of a camera export for each frame.
+    Returns ((N, 3), (N, 3)) arrays.'''
+
+    if isinstance(cameraTransform, CameraData):
+        return cameraTransform.origins(frames), cameraTransform.rotations(frames)
+
+    transforms = np.array([cameraTransform[frame] for frame in frames],
+                          dtype='float64').reshape(-1, 6)
+    return transforms[:, :3], transforms[:, 3:]
+
+def cameraMatrices(cameraTransform, frames):
+
+    '''Camera rotation matrices for each frame.  CameraData builds its per-frame
+    matrices once and keeps them in .matrices, so every joint and every solve
+    of the same camera export reuses them.  Returns (N, 3, 3) array.'''
+
+    if isinstance(cameraTransform, CameraData):
+        if cameraTransform.matrices is None:
+            cameraTransform.matrices = eulerMatrices(cameraTransform.data[:, 4:7])
+        return cameraTransform.matrices[cameraTransform.index(frames)]
+
+    return eulerMatrices(cameraArrays(cameraTransform, frames)[1])
+
+def trackArrays(track, markers, frames):
+
+    '''Track positions of a tracker export for each (marker, frame) pair.
+    Returns (N, 2) array.'''
+
+    if isinstance(track, TrackerData):
+        return track.positions(markers, frames)
+
+    return np.array([track[marker][int(frame)] for marker, frame in zip(markers, frames)],
+                    dtype='float64').reshape(-1, 2)
+
+def lineCrossFrames(markersA, markersB, frames, camA, camB, trackA, trackB, model='angles'):
+
+    '''Batched lineCross for parallel sequences of markers and frames read straight
+    from camera and tracker exports, projecting tracks under a camera model of
+    cameraModel.CAMERA_MODELS.  Returns (N, 4) array of (x, y, z, distance).'''
+
+    originA, rotationA = cameraArrays(camA, frames)
+    originB, rotationB = cameraArrays(camB, frames)
+
+    return lineCrossBatch(originA, rotationA, cameraLens(camA, model),
+                          trackArrays(trackA, markersA, frames),
+                          originB, rotationB, cameraLens(camB, model),
+                          trackArrays(trackB, markersB, frames),
+                          cameraMatrices(camA, frames), cameraMatrices(camB, frames))
@@ -0,0 +1,19 @@
+# shared fixtures, synthetic takes written by the benchmark's generator
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mocapSolver.benchmark import syntheticTake
+
+@pytest.fixture
+def take(tmp_path):
+
+    '''A 2 camera synthetic take with occlusions and marker switches.
+    Returns (camPaths, trackPaths, joint names, ground truth).'''
+
+    return syntheticTake(str(tmp_path / "take"), joints=6, markers=3, frames=120, occlusion=0.3,
+                         seed=1)
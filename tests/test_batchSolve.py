@@ -0,0 +1,41 @@
+# batch solves only replace a take's outputs once its solve succeeded
+
+import logging
+import os
+
+from mocapSolver.batchSolve import findTakes, solveJob
+from mocapSolver.solveBinary import binaryCurrent, binaryPath
+
+def _take(take):
+    takes = findTakes(os.path.dirname(take[0][0]))
+    assert len(takes) == 1
+    return takes[0]
+
+def test_failed_solve_keeps_outputs(take):
+    job = _take(take)
+    assert solveJob(job, binary=True)['status'] == 'solved'
+    with open(job['export']) as EXPORT:
+        solved = EXPORT.read()
+
+    with open(job['trackers'][0], "w") as EXPORT:
+        EXPORT.write("not a tracker export\n")
+    entry = solveJob(job, binary=True)
+    assert entry['status'] == 'failed'
+    with open(job['export']) as EXPORT:
+        assert EXPORT.read() == solved
+    assert binaryCurrent(job['export'])
+    assert not [name for name in os.listdir(job['directory']) if name.startswith(".")]
+
+def test_solve_replaces_stale_outputs(take):
+    job = _take(take)
+    assert solveJob(job, binary=True)['status'] == 'solved'
+    assert solveJob(job)['status'] == 'solved'
+    assert os.path.exists(job['export'])
+    assert not os.path.exists(binaryPath(job['export']))
+    assert not [name for name in os.listdir(job['directory']) if name.startswith(".")]
+
+def test_find_takes_logs_skipped(take, caplog):
+    os.remove(take[1][1])
+    with caplog.at_level(logging.WARNING, logger="mocapSolver.batchSolve"):
+        assert findTakes(os.path.dirname(take[0][0])) == []
+    assert "1 tracker exports for 2 cameras" in caplog.text
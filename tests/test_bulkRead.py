@@ -0,0 +1,84 @@
+# bulk loaders read what the line by line readers read and reject what they can't parse
+
+import pytest
+
+from mocapSolver.benchmark import syntheticTake
+from mocapSolver.bulkRead import cameraBulkLoad, trackerBulkLoad
+from mocapSolver.dataRead import cameraRead, trackerRead
+from mocapSolver.lazyTracker import trackerLazyLoad
+from mocapSolver.solver import solveTake
+from mocapSolver.streamSolve import solveTakeStreaming
+
+def _paths(take):
+    camPaths, trackPaths = take[:2]
+    return [path for pair in zip(camPaths, trackPaths) for path in pair]
+
+def _corrupt(path, frame):
+
+    '''Breaks the frame number of a row of an export, returns the row's byte offset.'''
+
+    with open(path, "rb") as EXPORT:
+        data = EXPORT.read()
+    row = data.index("\n{:05d} ".format(frame).encode()) + 1
+    with open(path, "wb") as EXPORT:
+        EXPORT.write(data[:row] + b"x" + data[row + 1:])
+    return row
+
+def test_negative_frames(tmp_path):
+    camPaths, trackPaths, joints, truth = syntheticTake(str(tmp_path), joints=2, frames=10,
+                                                        occlusion=0, start=-3)
+    camera = cameraBulkLoad(open(camPaths[0], "rb"))
+    expected = cameraRead(open(camPaths[0]))
+    assert camera.frames.tolist() == list(range(-3, 7))
+    assert camera.frames.tolist() == sorted(key for key in expected if isinstance(key, int))
+
+    tracker = trackerBulkLoad(open(trackPaths[0], "rb"))
+    expected = trackerRead(open(trackPaths[0]))
+    for name, marker in tracker.markers.items():
+        assert list(marker) == sorted(expected[name])
+        assert list(marker)[0] == -3
+
+def test_negative_frames_streaming(tmp_path):
+    take = syntheticTake(str(tmp_path / "take"), joints=3, frames=40, occlusion=0.2, start=-3)
+    solveTake(*_paths(take), str(tmp_path / "full.txt"))
+    solveTakeStreaming(*_paths(take), str(tmp_path / "stream.txt"), window=7)
+    with open(tmp_path / "full.txt") as FULL, open(tmp_path / "stream.txt") as STREAM:
+        full = FULL.read()
+        assert STREAM.read() == full
+    assert "\n-0002 " in full
+
+@pytest.mark.parametrize("export, line, key", [
+    (0, "ANGLE OF VIEW(radians) 0.8", "ANGLE"),
+    (0, "RANGE 1", "RANGE"),
+    (1, "NUMBER OF", "NUMBER")])
+def test_malformed_header_streaming(take, tmp_path, export, line, key):
+    path = take[export][0]
+    with open(path) as EXPORT:
+        lines = EXPORT.read().split("\n")
+    lines[[l for l, text in enumerate(lines) if text.startswith(key)][0]] = line
+    with open(path, "w") as EXPORT:
+        EXPORT.write("\n".join(lines))
+
+    message = "{}: malformed {} line in the export header".format(path, key)
+    load = cameraBulkLoad if export == 0 else trackerBulkLoad
+    with pytest.raises(ValueError, match=message):
+        load(open(path, "rb"))
+    with pytest.raises(ValueError, match=message):
+        solveTakeStreaming(*_paths(take), str(tmp_path / "stream.txt"))
+
+def test_corrupt_camera_row(take):
+    camPath = take[0][0]
+    row = _corrupt(camPath, 5)
+    with pytest.raises(ValueError, match="{}: malformed export row at byte {}$".format(camPath,
+                                                                                      row)):
+        cameraBulkLoad(open(camPath, "rb"))
+
+def test_corrupt_tracker_row(take):
+    trackPath = take[1][0]
+    row = _corrupt(trackPath, 5)
+    message = "{}: malformed export row at byte {}$".format(trackPath, row)
+    with pytest.raises(ValueError, match=message):
+        trackerBulkLoad(open(trackPath, "rb"))
+    tracker = trackerLazyLoad(open(trackPath, "rb"))
+    with pytest.raises(ValueError, match=message):
+        [tracker.markers[name] for name in tracker.markers]
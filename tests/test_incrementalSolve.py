@@ -0,0 +1,47 @@
+# incremental re-solves keep the binary solve in step with the text solve
+
+import os
+
+from mocapSolver.incrementalSolve import solveTakeIncremental
+from mocapSolver.solveBinary import binaryCurrent, binaryPath, binaryRead, binaryToExport
+from mocapSolver.solver import loadTake, solve, solveTake
+
+def _paths(take):
+    camPaths, trackPaths = take[:2]
+    return [path for pair in zip(camPaths, trackPaths) for path in pair]
+
+def _nudge(trackPath, marker, frame):
+
+    '''Moves one tracked position of a tracker export a little.'''
+
+    with open(trackPath) as EXPORT:
+        lines = EXPORT.read().split("\n")
+    row = lines.index("##### " + marker) + 1
+    while int(lines[row].split()[0]) != frame:
+        row += 1
+    number, x, y = lines[row].split()
+    lines[row] = "{} {:6f} {}".format(number, float(x) + 0.002, y)
+    with open(trackPath, "w") as EXPORT:
+        EXPORT.write("\n".join(lines))
+
+def test_binary_follows_incremental(take, tmp_path):
+    paths = _paths(take)
+    exportPath = str(tmp_path / "mocapSolved.txt")
+    solveTakeIncremental(*paths, exportPath)
+    os.remove(exportPath)
+    solveTake(*paths, exportPath, binary=True, dtype='float32')
+    solveTakeIncremental(*paths, exportPath)
+
+    _nudge(paths[1], "joint02.02", 40)
+    assert solveTakeIncremental(*paths, exportPath) > 0
+    assert binaryCurrent(exportPath)
+
+    header, positions, valid = binaryRead(open(binaryPath(exportPath), "rb"))
+    assert header['dtype'] == '<f4'
+    binary = binaryToExport(header, positions, valid)
+    expected = solve(*loadTake(*paths))
+    assert list(binary) == list(expected)
+    for joint in expected:
+        assert sorted(binary[joint]) == sorted(expected[joint])
+        for frame, point in expected[joint].items():
+            assert max(abs(a - b) for a, b in zip(binary[joint][frame], point[:3])) < 1e-5
@@ -0,0 +1,85 @@
+# solveMulti with 2 cameras matches solve, marker switches and mixed markers included
+
+import json
+import re
+
+import numpy as np
+import pytest
+
+from mocapSolver.benchmark import syntheticTake
+from mocapSolver.multiCamera import solveMulti
+from mocapSolver.residuals import residualPath
+from mocapSolver.solver import loadTake, solve, solveTake, solveTakeMulti
+
+def hideMarker(trackPath, marker, frames=None):
+
+    '''Removes a marker's rows on frames (every row if None) from a tracker export.'''
+
+    with open(trackPath) as EXPORT:
+        parts = re.split(r"(\n##### [^\n]*\n)", EXPORT.read())
+    kept = [parts[0]]
+    for header, rows in zip(parts[1::2], parts[2::2]):
+        if header.strip()[6:] == marker:
+            if frames is None:
+                continue
+            rows = "".join(row for row in rows.splitlines(True)
+                           if not row.strip() or int(row.split()[0]) not in frames)
+        kept += [header, rows]
+    with open(trackPath, "w") as EXPORT:
+        EXPORT.write("".join(kept))
+
+def _solveBoth(camPaths, trackPaths, dropped=None):
+    camA, camB, trackA, trackB = loadTake(camPaths[0], trackPaths[0], camPaths[1], trackPaths[1])
+    return (solve(camA, camB, trackA, trackB),
+            solveMulti([camA, camB], [trackA, trackB], dropped=dropped))
+
+def _assertSame(expected, solved):
+    assert list(solved) == list(expected)
+    for joint in expected:
+        assert sorted(solved[joint]) == sorted(expected[joint])
+        for frame, point in expected[joint].items():
+            assert np.allclose(solved[joint][frame][:3], point[:3], rtol=0, atol=1e-8)
+            # residuals on the same scale as the 2 camera solve
+            if len(point) > 3:
+                assert abs(solved[joint][frame][3] - point[3]) < 1e-8
+
+def test_synthetic_take(take):
+    camPaths, trackPaths = take[:2]
+    _assertSame(*_solveBoth(camPaths, trackPaths))
+
+def test_mixed_markers(tmp_path):
+    camPaths, trackPaths = syntheticTake(str(tmp_path), joints=2, markers=2, frames=60,
+                                         occlusion=0, seed=3)[:2]
+    # camera 1 only sees .01 and camera 2 only .02 on frames 20 to 25
+    hideMarker(trackPaths[0], "joint00.02", set(range(20, 26)))
+    hideMarker(trackPaths[1], "joint00.01", set(range(20, 26)))
+    dropped = {}
+    expected, solved = _solveBoth(camPaths, trackPaths, dropped)
+    assert len(expected["joint00"]) == 60
+    _assertSame(expected, solved)
+    assert dropped == {}
+
+def test_dropped_switches(tmp_path, caplog):
+    camPaths, trackPaths = syntheticTake(str(tmp_path), joints=2, markers=2, frames=60,
+                                         occlusion=0, seed=3)[:2]
+    # without .01 every frame is a marker switch with no solved frame before it
+    for trackPath in trackPaths:
+        hideMarker(trackPath, "joint01.01")
+    camA, camB, trackA, trackB = loadTake(camPaths[0], trackPaths[0], camPaths[1], trackPaths[1])
+    dropped = {}
+    EXPORT = solveMulti([camA, camB], [trackA, trackB], dropped=dropped)
+    assert len(EXPORT["joint00"]) == 60
+    assert EXPORT["joint01"] == {}
+    assert dropped == {"joint01": list(range(1, 61))}
+    assert "joint01: dropped 60 marker switch frames" in caplog.text
+
+def test_residual_summaries(take, tmp_path):
+    camPaths, trackPaths = take[:2]
+    solveTake(camPaths[0], trackPaths[0], camPaths[1], trackPaths[1],
+              str(tmp_path / "pair.txt"), residuals=True)
+    solveTakeMulti(camPaths, trackPaths, str(tmp_path / "multi.txt"), residuals=True)
+    with open(residualPath(str(tmp_path / "pair.txt"))) as PAIR, \
+            open(residualPath(str(tmp_path / "multi.txt"))) as MULTI:
+        pair, multi = json.load(PAIR), json.load(MULTI)
+    for key in ('frames', 'mean', 'max', 'p50', 'p90', 'p95', 'p99'):
+        assert multi['all'][key] == pytest.approx(pair['all'][key], rel=1e-9)
@@ -0,0 +1,50 @@
+# parallel solves match serial solves exactly
+
+from concurrent.futures import ProcessPoolExecutor
+
+from mocapSolver.solver import jointGroups, loadTake, solve, solveTake
+from mocapSolver.solveProfile import SolveProfile
+
+def _paths(take):
+    camPaths, trackPaths = take[:2]
+    return [path for pair in zip(camPaths, trackPaths) for path in pair]
+
+def test_jointGroups():
+    joints = ["joint{:02d}".format(j) for j in range(7)]
+    groups = jointGroups(joints, 3)
+    assert [len(group) for group in groups] == [3, 2, 2]
+    assert sum(groups, []) == joints
+    assert jointGroups(joints[:2], 8) == [["joint00"], ["joint01"]]
+
+def test_solve_workers(take):
+    data = loadTake(*_paths(take))
+    serial = solve(*data)
+    parallel = solve(*data, workers=3)
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+
+def test_solveTake_workers(take, tmp_path):
+    serialProfile = SolveProfile()
+    parallelProfile = SolveProfile()
+    solveTake(*_paths(take), str(tmp_path / "serial.txt"), binary=True, residuals=True,
+              profile=serialProfile)
+    solveTake(*_paths(take), str(tmp_path / "parallel.txt"), binary=True, residuals=True,
+              workers=2, profile=parallelProfile)
+    for suffix in (".txt", ".mcs"):
+        with open(tmp_path / ("serial" + suffix), "rb") as serial:
+            with open(tmp_path / ("parallel" + suffix), "rb") as parallel:
+                assert parallel.read() == serial.read()
+    assert parallelProfile.joints.keys() == serialProfile.joints.keys()
+    assert parallelProfile.counters == serialProfile.counters
+
+def test_solveTake_shared_pool(take, tmp_path):
+    solveTake(*_paths(take), str(tmp_path / "serial.txt"))
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for run in range(2):
+            solveTake(*_paths(take), str(tmp_path / "pool{}.txt".format(run)), workers=2,
+                      pool=pool)
+    with open(tmp_path / "serial.txt") as serial:
+        expected = serial.read()
+    for run in range(2):
+        with open(tmp_path / "pool{}.txt".format(run)) as pooled:
+            assert pooled.read() == expected
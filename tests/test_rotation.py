@@ -0,0 +1,55 @@
+# euler rotations, plain math against numpy and both against mathutils where it's installed
+
+import math
+
+import numpy as np
+import pytest
+
+from mocapSolver.rotation import eulerRotate, eulerRotateAxis
+from mocapSolver.triangulate import angleOfViewCalc
+from mocapSolver.vectorTriangulate import eulerMatrices
+
+def _samples(samples=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    eulers = rng.uniform(-math.pi, math.pi, (samples, 3))
+    angles = rng.uniform(-math.pi, math.pi, samples)
+    axes = np.array(['X', 'Y', 'Z'])[rng.integers(0, 3, samples)]
+    return eulers, axes, angles
+
+def _wrapped(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + math.pi) % (2 * math.pi) - math.pi)
+
+def test_math_matches_numpy():
+    eulers, axes, angles = _samples()
+    # gimbal lock, y turned onto +-90 degrees
+    eulers = np.vstack((eulers, [[0.3, 0.0, -0.7], [-1.1, 0.0, 0.4]]))
+    axes = np.append(axes, ['Y', 'Y'])
+    angles = np.append(angles, [math.pi / 2, -math.pi / 2])
+
+    ours = np.array([eulerRotate(euler, axis, angle) for euler, axis, angle
+                     in zip(eulers.tolist(), axes.tolist(), angles.tolist())])
+    numpy = np.vstack([eulerRotateAxis(euler, axis, angle) for euler, axis, angle
+                       in zip(eulers, axes, angles)])
+    assert _wrapped(ours, numpy).max() < 1e-12
+    assert np.abs(eulerMatrices(ours) - eulerMatrices(numpy)).max() < 1e-12
+
+def test_angle_of_view_is_plain_floats():
+    euler = angleOfViewCalc((1.2, -0.1, 0.5), (0.9, 0.6), (0.25, 0.8))
+    assert type(euler) is tuple and all(type(angle) is float for angle in euler)
+
+def test_matches_mathutils():
+    mathutils = pytest.importorskip("mathutils")
+    eulers, axes, angles = _samples()
+
+    theirs = np.empty_like(eulers)
+    for row, (euler, axis, angle) in enumerate(zip(eulers.tolist(), axes.tolist(),
+                                                   angles.tolist())):
+        rotated = mathutils.Euler(euler, 'XYZ')
+        rotated.rotate_axis(axis, angle)
+        theirs[row] = (rotated.x, rotated.y, rotated.z)
+    ours = np.array([eulerRotate(euler, axis, angle) for euler, axis, angle
+                     in zip(eulers.tolist(), axes.tolist(), angles.tolist())])
+
+    # mathutils is single precision
+    assert _wrapped(ours, theirs).max() < 1e-4
+    assert np.abs(eulerMatrices(ours) - eulerMatrices(theirs)).max() < 1e-5
@@ -0,0 +1,38 @@
+# binary solves are only trusted while they're as new as the text solve
+
+import os
+
+from mocapSolver.solveBinary import binaryCurrent, binaryPath, binaryRead
+from mocapSolver.solver import solveTake
+from mocapSolver.streamSolve import solveTakeStreaming
+
+def _paths(take):
+    camPaths, trackPaths = take[:2]
+    return [path for pair in zip(camPaths, trackPaths) for path in pair]
+
+def test_binaryCurrent(tmp_path):
+    exportPath = str(tmp_path / "mocapSolved.txt")
+    assert not binaryCurrent(exportPath)
+    with open(binaryPath(exportPath), "wb"):
+        pass
+    assert binaryCurrent(exportPath)
+    with open(exportPath, "w"):
+        pass
+    os.utime(binaryPath(exportPath), (0, 0))
+    assert not binaryCurrent(exportPath)
+
+def test_text_solve_discards_binary(take, tmp_path):
+    exportPath = str(tmp_path / "mocapSolved.txt")
+    solveTake(*_paths(take), exportPath, binary=True)
+    assert binaryCurrent(exportPath)
+    header, positions, valid = binaryRead(open(binaryPath(exportPath), "rb"))
+    assert header['joints'] == take[2]
+
+    os.remove(exportPath)
+    solveTake(*_paths(take), exportPath)
+    assert not os.path.exists(binaryPath(exportPath))
+
+    solveTake(*_paths(take), str(tmp_path / "stream.txt"), binary=True)
+    os.remove(tmp_path / "stream.txt")
+    solveTakeStreaming(*_paths(take), str(tmp_path / "stream.txt"), window=50)
+    assert not os.path.exists(binaryPath(str(tmp_path / "stream.txt")))
@@ -0,0 +1,33 @@
+# the vectorized, scalar and windowed solves agree on heavily occluded takes
+
+import numpy as np
+
+from mocapSolver.benchmark import syntheticTake
+from mocapSolver.solver import loadTake, solve, solveScalar, solveTake
+from mocapSolver.streamSolve import solveTakeStreaming
+
+def _paths(take):
+    camPaths, trackPaths = take[:2]
+    return [path for pair in zip(camPaths, trackPaths) for path in pair]
+
+def test_scalar_matches_vectorized(tmp_path):
+    take = syntheticTake(str(tmp_path), joints=4, markers=3, frames=150, occlusion=0.4, seed=2)
+    data = loadTake(*_paths(take))
+    droppedScalar = {}
+    droppedVector = {}
+    scalar = solveScalar(*data, dropped=droppedScalar)
+    vector = solve(*data, dropped=droppedVector)
+    assert droppedVector and droppedVector == droppedScalar
+    assert list(vector) == list(scalar)
+    for joint in scalar:
+        assert sorted(vector[joint]) == sorted(scalar[joint])
+        for frame, point in scalar[joint].items():
+            assert np.allclose(vector[joint][frame][:3], point[:3], rtol=0, atol=1e-10)
+
+def test_windows_match_full_solve(take, tmp_path):
+    solveTake(*_paths(take), str(tmp_path / "full.txt"))
+    for window in (1, 7, 50):
+        exportPath = str(tmp_path / "window{}.txt".format(window))
+        solveTakeStreaming(*_paths(take), exportPath, window=window)
+        with open(exportPath) as streamed, open(tmp_path / "full.txt") as full:
+            assert streamed.read() == full.read()